@@ -46,11 +46,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # After AuthenticationMiddleware, it needs the session user
+    'core.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -79,14 +82,63 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Process-local connection pool size, 0 disables pooling
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 0))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'core.db.backends.mysql',
         'NAME': os.environ.get('DB_NAME'),
         'USER': 'root',
         'PASSWORD': '',
         'HOST': os.environ.get('DB_HOST'),
         'PORT': '3306',
+        # Pooled connections go back to the pool after every request
+        'CONN_MAX_AGE': (
+            0 if DB_POOL_SIZE
+            else int(os.environ.get('DB_CONN_MAX_AGE', 60))
+        ),
+        # Ping reused connections once per request, see core.db.backends
+        'CONN_HEALTH_CHECKS': True,
+        'POOL': {
+            'MAX_SIZE': DB_POOL_SIZE,
+            'IDLE_TIMEOUT': int(os.environ.get('DB_POOL_IDLE_TIMEOUT', 300)),
+            'TIMEOUT': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        } if DB_POOL_SIZE else None,
+    }
+}
+
+# Read replicas, comma separated hosts sharing the primary's credentials
+DB_REPLICA_HOSTS = [
+    host.strip()
+    for host in os.environ.get('DB_REPLICA_HOSTS', '').split(',')
+    if host.strip()
+]
+for index, host in enumerate(DB_REPLICA_HOSTS, start=1):
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Replica reads for the recipe and user APIs, see core.routers
+DATABASE_ROUTING = {
+    'REPLICAS': [alias for alias in DATABASES if alias != 'default'],
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
@@ -137,5 +189,47 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
-    'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema'
+    'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'core.renderers.MessagePackRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+        'core.parsers.MessagePackParser',
+    ],
+}
+
+# The dict settings of the project's own components are merged over the
+# defaults kept next to their code, see core.conf; only the keys that
+# differ are set here. Unset ones use the defaults entirely:
+# TOKEN_AUTH_CACHE (user.authentication), RECIPE_RESPONSE_CACHE
+# (recipes.cache), RECIPE_BULK (recipes.views), USER_DELETION
+# (core.deletion) and READINESS_PROBE (core.views).
+
+# Lifetimes in seconds of stateless signed tokens, see user.tokens
+SIGNED_TOKEN_ACCESS_LIFETIME = 300
+SIGNED_TOKEN_REFRESH_LIFETIME = 60 * 60 * 24 * 14
+
+# Rows fetched per query when streaming the full recipe list
+RECIPE_STREAM_CHUNK_SIZE = 1000
+
+# Email validation on signup, see user.email_validation. Set
+# EMAIL_VALIDATION_MODE=syntax to skip DNS checks, e.g. when air-gapped.
+EMAIL_VALIDATION = {
+    'MODE': os.environ.get('EMAIL_VALIDATION_MODE', 'deliverability'),
+}
+
+# Per-request query and timing instrumentation, see core.middleware
+SERVER_TIMING = {
+    'ENABLED': os.environ.get('SERVER_TIMING', '') == '1',
+}
+
+# On-demand profiling of staff requests, see core.middleware
+REQUEST_PROFILING = {
+    'ENABLED': os.environ.get('REQUEST_PROFILING', '') == '1',
+    'DIRECTORY': os.environ.get('PROFILE_DIR', '/tmp/profiles'),
 }
@@ -20,6 +20,8 @@ from drf_spectacular.views import (
 from django.contrib import admin
 from django.urls import path, include
 
+from core import views as core_views
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
@@ -29,5 +31,8 @@ urlpatterns = [
         name='api-docs'
     ),
     path('api/user/', include('user.urls')),
-    path('api/recipes/', include('recipes.urls'))
+    path('api/recipes/', include('recipes.urls')),
+    path('healthz', core_views.healthz, name='healthz'),
+    path('readyz', core_views.readyz, name='readyz'),
+    path('statsz', core_views.statsz, name='statsz'),
 ]
@@ -1,11 +1,39 @@
 """
 Django admin customisation
 """
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
 from core import models
+from core.db.estimates import estimated_count
+from core.deletion import schedule_user_deletion
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator which never counts a whole large table
+
+    An unfiltered list takes its count from the planner statistics once
+    they report at least estimate_threshold rows. Anything else is
+    counted exactly, but only up to max_count rows, so a broad search
+    pages through the first max_count results.
+    """
+    estimate_threshold = 10000
+    max_count = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate is not None and \
+                    estimate >= self.estimate_threshold:
+                return estimate
+
+        return queryset[:self.max_count].count()
 
 
 class UserAdmin(BaseUserAdmin):
@@ -13,7 +41,13 @@ class UserAdmin(BaseUserAdmin):
     Defining the admin pages for users
     """
     ordering = ['id']
-    list_display = ['email', 'name']
+    list_display = ['email', 'name', 'recipe_count']
+    # Prefix searches use the unique index on email; also serves the
+    # recipe user autocomplete
+    search_fields = ['^email']
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    actions = ['schedule_deletion']
     fieldsets = [
         [None, {'fields': ['email', 'password']}],
         [_('Permissions'), {'fields': [
@@ -21,9 +55,9 @@ class UserAdmin(BaseUserAdmin):
             'is_staff',
             'is_superuser'
         ]}],
-        [_('History'), {'fields': ['last_login']}]
+        [_('History'), {'fields': ['last_login', 'recipe_count']}]
     ]
-    readonly_fields = ['last_login']
+    readonly_fields = ['last_login', 'recipe_count']
     add_fieldsets = [
         [None, {
             'classes': ['wide'],
@@ -38,6 +72,63 @@ class UserAdmin(BaseUserAdmin):
             ]}]
     ]
 
+    def has_delete_permission(self, request, obj=None):
+        """
+        Users are deleted in the background, see schedule_deletion
+
+        The admin's own delete would collect and delete every recipe of
+        the user in the request.
+        """
+        return False
+
+    @admin.action(description=_('Deactivate and delete in the background'))
+    def schedule_deletion(self, request, queryset):
+        for user in queryset:
+            schedule_user_deletion(user)
+        self.message_user(
+            request,
+            _('%d users deactivated and queued for deletion.') % len(queryset),
+            messages.SUCCESS
+        )
+
+
+class RecipeAdmin(admin.ModelAdmin):
+    """
+    Defining the admin pages for recipes
+    """
+    ordering = ['-id']
+    list_display = ['id', 'title', 'user', 'price', 'time_minutes',
+                    'updated_at']
+    list_select_related = ['user']
+    list_filter = ['updated_at']
+    # Prefix searches use the index on title
+    search_fields = ['^title']
+    autocomplete_fields = ['user']
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+
+class UserDeletionAdmin(admin.ModelAdmin):
+    """
+    Defining the read-only admin pages for user deletion progress
+    """
+    ordering = ['-requested_at']
+    list_display = ['email', 'status', 'recipes_deleted', 'recipes_total',
+                    'progress_percent', 'requested_at', 'finished_at']
+    list_filter = ['status']
+    search_fields = ['^email']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description=_('Progress'))
+    def progress_percent(self, obj):
+        return f'{obj.progress:.0%}'
+
 
 admin.site.register(models.User, UserAdmin)
-admin.site.register(models.Recipe)
+admin.site.register(models.Recipe, RecipeAdmin)
+admin.site.register(models.UserDeletion, UserDeletionAdmin)
@@ -0,0 +1,97 @@
+"""
+Helpers for async API views served under ASGI
+"""
+import functools
+
+import orjson
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+
+from django.db import connections
+from django.http import HttpResponse
+
+from rest_framework import exceptions, status
+from rest_framework.permissions import SAFE_METHODS
+
+from core.renderers import ORJSONRenderer
+from core.routers import pin_user
+from user.authentication import authenticate_async
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    """
+    Return data rendered with the API's JSON renderer
+    """
+    return HttpResponse(
+        ORJSONRenderer().render(data),
+        status=status_code,
+        content_type='application/json'
+    )
+
+
+def parse_json(request):
+    """
+    Return the decoded JSON request body
+    """
+    try:
+        return orjson.loads(request.body or b'{}')
+    except orjson.JSONDecodeError as exc:
+        raise exceptions.ParseError(f'JSON parse error - {exc}')
+
+
+def method_not_allowed(request):
+    return exception_response(exceptions.MethodNotAllowed(request.method))
+
+
+def exception_response(exc):
+    """
+    Return the response DRF would send for an API exception
+    """
+    if isinstance(exc.detail, (dict, list)):
+        data = exc.detail
+    else:
+        data = {'detail': exc.detail}
+    response = json_response(data, status_code=exc.status_code)
+
+    if isinstance(exc, (exceptions.NotAuthenticated,
+                        exceptions.AuthenticationFailed)):
+        response['WWW-Authenticate'] = 'Token'
+
+    return response
+
+
+def close_connections():
+    for connection in connections.all():
+        connection.close()
+
+
+def async_api_view(view):
+    """
+    Wrap an async view with token authentication and API error handling
+
+    Each request gets its own thread for synchronous ORM calls made with
+    sync_to_async, so one slow query does not hold up other requests.
+    The thread's database connections are closed when the request ends.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        async with ThreadSensitiveContext():
+            try:
+                result = await authenticate_async(request)
+                if result is None:
+                    raise exceptions.NotAuthenticated()
+                request.user, request.auth = result
+
+                response = await view(request, *args, **kwargs)
+                if (request.method not in SAFE_METHODS and
+                        response.status_code < 400):
+                    await sync_to_async(pin_user)(request.user.pk)
+
+                return response
+            except exceptions.APIException as exc:
+                return exception_response(exc)
+            finally:
+                await sync_to_async(close_connections)()
+
+    # API clients authenticate with tokens, not cookies
+    wrapper.csrf_exempt = True
+    return wrapper
@@ -0,0 +1,14 @@
+"""
+Settings of the project's own components
+"""
+from django.conf import settings
+
+
+def get_settings(name, defaults):
+    """
+    Return the settings dict called name merged over its defaults
+
+    Each component keeps its defaults next to the code using them, so
+    settings.py and tests only set the keys they change.
+    """
+    return {**defaults, **getattr(settings, name, {})}
@@ -0,0 +1,98 @@
+"""
+Connection health checks and pooling for database backends
+"""
+from core.db.pool import existing_pool, get_pool
+
+
+class HealthCheckMixin:
+    """
+    Check a persistent connection before its first use in each request
+
+    Enabled by CONN_HEALTH_CHECKS in the database settings. A connection
+    kept open by CONN_MAX_AGE may have been dropped by the server while
+    idle; instead of failing the request it is replaced with a new one.
+    """
+    health_check_done = False
+
+    @property
+    def health_check_enabled(self):
+        return bool(self.settings_dict.get('CONN_HEALTH_CHECKS'))
+
+    def connect(self):
+        super().connect()
+        # A new connection needs no check until the next request
+        self.health_check_done = True
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def close_if_health_check_failed(self):
+        if (self.connection is None or self.health_check_done or
+                not self.health_check_enabled):
+            return
+        self.health_check_done = True
+        if not self.in_atomic_block and not self.is_usable():
+            self.close()
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
+
+
+class PooledConnectionMixin:
+    """
+    Take connections from a process-local pool and return them on close
+
+    Enabled by a POOL dict in the database settings, see core.db.pool.
+    Set CONN_MAX_AGE to 0 with a pool so connections go back to it at the
+    end of every request. Connections closed inside a transaction or
+    after errors that left them unusable are discarded.
+    """
+
+    def validate_connection(self, connection):
+        """
+        Raise if a raw connection taken from the pool is unusable
+
+        Runs the same query as Django's is_usable() checks; backends with
+        a cheaper check, such as MySQL's ping, override this.
+        """
+        cursor = connection.cursor()
+        try:
+            cursor.execute('SELECT 1')
+        finally:
+            cursor.close()
+
+    def get_new_connection(self, conn_params):
+        options = self.settings_dict.get('POOL')
+        if not options:
+            return super().get_new_connection(conn_params)
+
+        connect = super().get_new_connection
+        validate = None
+        if self.settings_dict.get('CONN_HEALTH_CHECKS'):
+            validate = self.validate_connection
+
+        pool = get_pool(
+            self.alias,
+            lambda: connect(conn_params),
+            options,
+            validate=validate
+        )
+        return pool.acquire()
+
+    def _close(self):
+        pool = existing_pool(self.alias)
+        if pool is None or not self.settings_dict.get('POOL'):
+            return super()._close()
+
+        connection = self.connection
+        reusable = (
+            not self.in_atomic_block and
+            self.autocommit and
+            (not self.errors_occurred or self.is_usable())
+        )
+        if reusable:
+            pool.release(connection)
+        else:
+            pool.discard(connection)
@@ -0,0 +1,14 @@
+"""
+MySQL backend with connection health checks and optional pooling
+"""
+from django.db.backends.mysql import base
+
+from core.db.backends.mixins import HealthCheckMixin, PooledConnectionMixin
+
+
+class DatabaseWrapper(HealthCheckMixin,
+                      PooledConnectionMixin,
+                      base.DatabaseWrapper):
+
+    def validate_connection(self, connection):
+        connection.ping()
@@ -0,0 +1,21 @@
+"""
+Backend-agnostic database errors
+"""
+from django.db import connections
+from django.db.utils import InterfaceError, OperationalError
+
+
+def connection_errors(alias):
+    """
+    Return the exceptions meaning a database cannot be reached
+
+    Django's wrappers plus the driver's own classes, which escape when
+    code talks to the driver outside Django's error wrapping.
+    """
+    database = connections[alias].Database
+    return (
+        OperationalError,
+        InterfaceError,
+        database.OperationalError,
+        database.InterfaceError,
+    )
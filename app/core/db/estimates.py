@@ -0,0 +1,40 @@
+"""
+Row count estimates from the database's planner statistics
+"""
+from django.db import connections
+
+
+def estimated_count(model, using='default'):
+    """
+    Return an estimate of the rows in a model's table, or None
+
+    The estimate is what the query planner works with, so it is free to
+    read but may be off by a few percent. None means the backend keeps
+    no usable statistics.
+    """
+    connection = connections[using]
+    table = connection.ops.quote_name(model._meta.db_table)
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            # information_schema.TABLES is cached for up to a day on MySQL
+            # 8, EXPLAIN asks InnoDB for its current estimate
+            cursor.execute(f'EXPLAIN SELECT 1 FROM {table}')
+            columns = [column[0].lower() for column in cursor.description]
+            row = cursor.fetchone()
+            estimate = row[columns.index('rows')] if row else None
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                [table]
+            )
+            row = cursor.fetchone()
+            estimate = row[0] if row else None
+        else:
+            return None
+
+    # PostgreSQL reports -1 for tables that were never analysed
+    if estimate is None or estimate < 0:
+        return None
+
+    return int(estimate)
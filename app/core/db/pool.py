@@ -0,0 +1,283 @@
+"""
+Process-local database connection pool
+"""
+import threading
+import time
+
+from django.db.utils import OperationalError
+
+
+class PoolTimeout(OperationalError):
+    """
+    Raised when no connection became free within the checkout timeout
+    """
+
+
+def close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+class PoolStats:
+    """
+    Checkout counters and wait times of a pool
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def record_checkout(self, wait, blocked):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_time_total += wait
+            self.wait_time_max = max(self.wait_time_max, wait)
+            if blocked:
+                self.waits += 1
+
+    def record_timeout(self, wait):
+        with self._lock:
+            self.timeouts += 1
+            self.wait_time_total += wait
+            self.wait_time_max = max(self.wait_time_max, wait)
+
+    def record_created(self):
+        with self._lock:
+            self.created += 1
+
+    def record_discarded(self):
+        with self._lock:
+            self.discarded += 1
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.created = 0
+            self.discarded = 0
+            self.timeouts = 0
+            self.waits = 0
+            self.wait_time_total = 0.0
+            self.wait_time_max = 0.0
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'created': self.created,
+                'discarded': self.discarded,
+                'timeouts': self.timeouts,
+                'waits': self.waits,
+                'wait_time_total': self.wait_time_total,
+                'wait_time_max': self.wait_time_max,
+                'wait_time_mean': (
+                    self.wait_time_total / self.checkouts
+                    if self.checkouts else 0.0
+                ),
+            }
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of at most max_size connections made by factory
+
+    Idle connections are reused newest first, so surplus connections sit
+    at the bottom and are closed once idle for longer than idle_timeout.
+    When every connection is checked out, acquire() waits up to timeout
+    seconds for one to be released. validate, if given, is called with
+    an idle connection before it is handed out and should raise if the
+    connection is unusable.
+    """
+
+    def __init__(self, factory, max_size=10, idle_timeout=300, timeout=10,
+                 validate=None, close=close_quietly):
+        self.factory = factory
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.validate = validate
+        self.close = close
+        self.stats = PoolStats()
+
+        self._idle = []  # (released at, connection), newest last
+        self._size = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """
+        Return an idle or new connection, waiting for one if necessary
+        """
+        start = time.monotonic()
+        deadline = start + self.timeout
+        blocked = False
+
+        while True:
+            connection, waited = self._checkout(start, deadline)
+            blocked = blocked or waited
+            if connection is None:
+                connection = self._create()
+                break
+            if self.validate is None:
+                break
+            try:
+                self.validate(connection)
+                break
+            except Exception:
+                self.discard(connection)
+
+        self.stats.record_checkout(time.monotonic() - start, blocked)
+        return connection
+
+    def release(self, connection):
+        """
+        Return a checked out connection to the pool
+        """
+        with self._condition:
+            self._idle.append((time.monotonic(), connection))
+            self._condition.notify()
+
+    def discard(self, connection):
+        """
+        Close a checked out connection instead of returning it
+        """
+        self.close(connection)
+        self.stats.record_discarded()
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def clear(self):
+        """
+        Close every idle connection
+        """
+        with self._condition:
+            idle = [connection for _released, connection in self._idle]
+            self._idle = []
+            self._size -= len(idle)
+            self._condition.notify_all()
+        self._close_all(idle)
+
+    def snapshot(self):
+        with self._condition:
+            size, idle = self._size, len(self._idle)
+        return {
+            'max_size': self.max_size,
+            'size': size,
+            'idle': idle,
+            'in_use': size - idle,
+            **self.stats.snapshot(),
+        }
+
+    def _checkout(self, start, deadline):
+        """
+        Return an idle connection, or None after reserving a new one
+
+        The second value tells whether the checkout had to wait.
+        """
+        stale = []
+        waited = False
+        try:
+            with self._condition:
+                while True:
+                    stale.extend(self._prune())
+                    if self._idle:
+                        return self._idle.pop()[1], waited
+                    if self._size < self.max_size:
+                        self._size += 1
+                        return None, waited
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats.record_timeout(time.monotonic() - start)
+                        raise PoolTimeout(
+                            f'No database connection became free within '
+                            f'{self.timeout} seconds'
+                        )
+                    waited = True
+                    self._condition.wait(remaining)
+        finally:
+            self._close_all(stale)
+
+    def _create(self):
+        try:
+            connection = self.factory()
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+        self.stats.record_created()
+        return connection
+
+    def _prune(self):
+        """
+        Remove and return idle connections past the idle timeout
+
+        Must be called with the lock held; the caller closes them.
+        """
+        cutoff = time.monotonic() - self.idle_timeout
+        count = 0
+        while count < len(self._idle) and self._idle[count][0] < cutoff:
+            count += 1
+        if not count:
+            return []
+
+        stale = [connection for _released, connection in self._idle[:count]]
+        del self._idle[:count]
+        self._size -= count
+        return stale
+
+    def _close_all(self, connections):
+        for connection in connections:
+            self.close(connection)
+            self.stats.record_discarded()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, factory, options, validate=None):
+    """
+    Return the pool of a database alias, creating it on first use
+
+    options are the alias' POOL settings: MAX_SIZE, IDLE_TIMEOUT and
+    TIMEOUT.
+    """
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None:
+            pool = _pools[alias] = ConnectionPool(
+                factory,
+                max_size=options.get('MAX_SIZE', 10),
+                idle_timeout=options.get('IDLE_TIMEOUT', 300),
+                timeout=options.get('TIMEOUT', 10),
+                validate=validate
+            )
+        return pool
+
+
+def existing_pool(alias):
+    return _pools.get(alias)
+
+
+def pool_stats():
+    """
+    Return a snapshot of every pool in this process by alias
+    """
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.snapshot() for alias, pool in pools.items()}
+
+
+def close_pools():
+    """
+    Close the idle connections of every pool and forget the pools
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.clear()
@@ -0,0 +1,141 @@
+"""
+Chunked background deletion of users and their recipes
+"""
+import datetime
+import logging
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.conf import get_settings
+from core.models import Recipe, UserDeletion
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_DELETION = {
+    'CHUNK_SIZE': 1000,  # recipes deleted per transaction
+    'PAUSE': 0,  # seconds to sleep between chunks
+    'LEASE': 300,  # seconds a worker holds a job without progress
+}
+
+# Jobs a worker may pick up; failed jobs are retried
+RUNNABLE = (UserDeletion.PENDING, UserDeletion.RUNNING, UserDeletion.FAILED)
+
+
+def schedule_user_deletion(user):
+    """
+    Deactivate a user and queue the deletion of their data
+
+    The user can no longer authenticate once this returns. Scheduling a
+    user twice returns the existing job.
+    """
+    with transaction.atomic():
+        user.is_active = False
+        # Saving evicts the user's cached tokens, see user.signals
+        user.save(update_fields=['is_active'])
+        user.refresh_from_db(fields=['recipe_count'])
+        job, _created = UserDeletion.objects.get_or_create(
+            user=user,
+            defaults={
+                'email': user.email,
+                'recipes_total': user.recipe_count,
+            }
+        )
+
+    return job
+
+
+def lease_until():
+    return timezone.now() + datetime.timedelta(
+        seconds=get_settings('USER_DELETION', DEFAULT_USER_DELETION)['LEASE']
+    )
+
+
+def claim(job):
+    """
+    Take the lease on a job, returning False if another worker holds it
+    """
+    now = timezone.now()
+    return bool(UserDeletion.objects.filter(
+        Q(lease_expires__isnull=True) | Q(lease_expires__lt=now),
+        pk=job.pk,
+        status__in=RUNNABLE,
+    ).update(status=UserDeletion.RUNNING, lease_expires=lease_until()))
+
+
+def delete_chunk(job, chunk_size):
+    """
+    Delete one chunk of the user's recipes and record the progress
+
+    Both happen in one short transaction, so an interrupted job resumes
+    with an accurate count.
+    """
+    with transaction.atomic():
+        ids = list(Recipe.objects.filter(
+            user_id=job.user_id
+        ).order_by('id').values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return 0
+
+        deleted, _ = Recipe.objects.filter(pk__in=ids).delete()
+        UserDeletion.objects.filter(pk=job.pk).update(
+            recipes_deleted=F('recipes_deleted') + deleted,
+            lease_expires=lease_until()
+        )
+
+    return deleted
+
+
+def run_user_deletion(job):
+    """
+    Delete the recipes of a scheduled user in chunks, then the user
+
+    Returns False without doing anything when another worker holds the
+    job. A failure is recorded on the job, which the next run resumes.
+    """
+    if not claim(job):
+        return False
+    options = get_settings('USER_DELETION', DEFAULT_USER_DELETION)
+
+    try:
+        while delete_chunk(job, options['CHUNK_SIZE']):
+            if options['PAUSE']:
+                # Let replicas catch up between chunks
+                time.sleep(options['PAUSE'])
+
+        with transaction.atomic():
+            if job.user_id is not None:
+                get_user_model()._base_manager.filter(
+                    pk=job.user_id
+                ).delete()
+            UserDeletion.objects.filter(pk=job.pk).update(
+                status=UserDeletion.DONE,
+                lease_expires=None,
+                error='',
+                finished_at=timezone.now()
+            )
+    except Exception as exc:
+        logger.exception('Deleting user %s failed', job.user_id)
+        UserDeletion.objects.filter(pk=job.pk).update(
+            status=UserDeletion.FAILED,
+            lease_expires=None,
+            error=repr(exc)
+        )
+        raise
+
+    job.refresh_from_db()
+    return True
+
+
+def pending_user_deletions():
+    """
+    Return the jobs waiting for a worker, oldest first
+    """
+    return UserDeletion.objects.filter(
+        Q(lease_expires__isnull=True) | Q(lease_expires__lt=timezone.now()),
+        status__in=RUNNABLE,
+    ).order_by('requested_at', 'pk')
@@ -0,0 +1,348 @@
+"""
+Django command to benchmark the recipe and user API endpoints in-process.
+"""
+import json
+import platform
+import random
+import statistics
+import time
+from contextlib import ExitStack
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from recipes.cache import stats as cache_stats
+from user.authentication import evict_user
+
+
+BENCH_DOMAIN = '@benchmark.invalid'
+BENCH_EMAIL = 'bench-api-{}' + BENCH_DOMAIN
+BENCH_PASSWORD = 'benchpass123'
+
+SCENARIOS = ('list', 'detail', 'create', 'token', 'me')
+
+# Expected status code of each scenario
+EXPECTED_STATUS = {
+    'list': 200,
+    'detail': 200,
+    'create': 201,
+    'token': 200,
+    'me': 200,
+}
+
+
+def percentile(sorted_values, fraction):
+    """
+    Return the nearest-rank percentile of already sorted values
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    """
+    Seed users and recipes, then time API requests made through the test
+    client and report latency percentiles, throughput and queries.
+
+    The seed data is committed so writes are timed with their commit, and
+    deleted again when the run ends or fails. Reads are kept on the
+    primary, as replicas may not have caught up with the seed data.
+    Queries are counted on every database.
+    """
+    help = (
+        'Seed users and recipes, drive the API endpoints through the test '
+        'client and report latency, throughput and queries per request. '
+        'Everything written is deleted afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=10,
+            help='Number of users to seed.'
+        )
+        parser.add_argument(
+            '--recipes-per-user', type=int, default=100,
+            help='Number of recipes seeded for each user.'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Number of timed requests per scenario.'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=10,
+            help='Number of untimed requests per scenario.'
+        )
+        parser.add_argument(
+            '--scenario', action='append', choices=SCENARIOS,
+            dest='scenarios',
+            help='Scenario to run, may be repeated. Defaults to all.'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Random seed for picking users and recipes.'
+        )
+        parser.add_argument(
+            '--output',
+            help='Write the results as JSON to this file.'
+        )
+        parser.add_argument(
+            '--compare',
+            help='JSON results of an earlier run to compare against.'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Entrypoint for command.
+        """
+        baseline = self.load_baseline(options['compare'])
+        self.random = random.Random(options['seed'])
+        scenarios = options['scenarios'] or list(SCENARIOS)
+
+        # The test client sends requests for the host "testserver"
+        with override_settings(
+            ALLOWED_HOSTS=['testserver'],
+            DATABASE_ROUTING={'REPLICAS': []}
+        ):
+            self.cleanup()
+            try:
+                users = self.seed(
+                    options['users'], options['recipes_per_user']
+                )
+                results = {
+                    name: self.run_scenario(
+                        name, users, options['requests'], options['warmup']
+                    )
+                    for name in scenarios
+                }
+            finally:
+                self.cleanup()
+
+        report = {
+            'environment': self.environment(),
+            'parameters': {
+                'users': options['users'],
+                'recipes_per_user': options['recipes_per_user'],
+                'requests': options['requests'],
+                'warmup': options['warmup'],
+                'seed': options['seed'],
+            },
+            'scenarios': results,
+        }
+        self.report(results, baseline)
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2, sort_keys=True)
+            self.stdout.write(f'Results written to {options["output"]}')
+
+    def load_baseline(self, path):
+        """
+        Return the scenarios of an earlier run, or None
+        """
+        if not path:
+            return None
+        try:
+            with open(path) as baseline:
+                return json.load(baseline)['scenarios']
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f'Cannot read baseline {path}: {exc}')
+
+    def seed(self, users, recipes_per_user):
+        """
+        Create the benchmark users, tokens and recipes
+
+        Returns a list of (user id, token key, recipe ids) per user.
+        """
+        self.stdout.write(
+            f'Seeding {users} users with {recipes_per_user} recipes each...'
+        )
+        user_model = get_user_model()
+        password = make_password(BENCH_PASSWORD)
+        created = user_model.objects.bulk_create([
+            user_model(email=BENCH_EMAIL.format(i), password=password)
+            for i in range(users)
+        ])
+        if created and created[0].pk is None:
+            created = list(user_model.objects.filter(
+                email__in=[BENCH_EMAIL.format(i) for i in range(users)]
+            ).order_by('id'))
+
+        Recipe.objects.bulk_create([
+            Recipe(
+                user=user,
+                title=f'Benchmark recipe {i}',
+                time_minutes=i % 180,
+                price=i % 100,
+                description='Benchmark description',
+            )
+            for user in created
+            for i in range(recipes_per_user)
+        ], batch_size=1000)
+
+        recipe_ids = {}
+        for user_id, recipe_id in Recipe.objects.filter(
+            user__in=created
+        ).values_list('user_id', 'id'):
+            recipe_ids.setdefault(user_id, []).append(recipe_id)
+
+        return [
+            (
+                user.pk,
+                Token.objects.create(user=user).key,
+                recipe_ids.get(user.pk, [])
+            )
+            for user in created
+        ]
+
+    def cleanup(self):
+        """
+        Delete the benchmark users and recipes, including those left by an
+        interrupted run, and drop their cache entries
+        """
+        user_ids = list(get_user_model()._base_manager.filter(
+            email__endswith=BENCH_DOMAIN
+        ).values_list('pk', flat=True))
+        if not user_ids:
+            return
+
+        self.stdout.write(f'Deleting {len(user_ids)} benchmark users...')
+        for user_id in user_ids:
+            evict_user(user_id)
+        Recipe.objects.filter(user__in=user_ids).delete()
+        get_user_model()._base_manager.filter(pk__in=user_ids).delete()
+
+    def make_request(self, name, users, index):
+        """
+        Return the client call for one request of a scenario
+        """
+        user_id, key, recipe_ids = users[index % len(users)]
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {key}')
+
+        if name == 'list':
+            return lambda: client.get(reverse('recipes:recipe-list'))
+        if name == 'detail':
+            url = reverse(
+                'recipes:recipe-detail',
+                args=[self.random.choice(recipe_ids)]
+            )
+            return lambda: client.get(url)
+        if name == 'create':
+            payload = {
+                'title': f'Benchmark create {index}',
+                'time_minutes': 10,
+                'price': '5.00',
+            }
+            return lambda: client.post(
+                reverse('recipes:recipe-list'), payload
+            )
+        if name == 'token':
+            payload = {
+                'email': BENCH_EMAIL.format(index % len(users)),
+                'password': BENCH_PASSWORD,
+            }
+            return lambda: APIClient().post(reverse('user:token'), payload)
+
+        return lambda: client.get(reverse('user:me'))
+
+    def run_scenario(self, name, users, requests, warmup):
+        """
+        Time the requests of one scenario and summarise them
+        """
+        if name == 'detail' and not any(ids for _u, _k, ids in users):
+            raise CommandError('The detail scenario needs seeded recipes.')
+        self.stdout.write(f'Running {name}...')
+
+        for index in range(warmup):
+            self.make_request(name, users, index)()
+
+        cache_stats.reset()
+        timings = []
+        queries = 0
+        errors = 0
+        started = time.perf_counter()
+        for index in range(requests):
+            call = self.make_request(name, users, index)
+            with ExitStack() as stack:
+                contexts = [
+                    stack.enter_context(CaptureQueriesContext(
+                        connections[alias]
+                    ))
+                    for alias in connections
+                ]
+                start = time.perf_counter()
+                response = call()
+                timings.append((time.perf_counter() - start) * 1000)
+            queries += sum(len(context) for context in contexts)
+            if response.status_code != EXPECTED_STATUS[name]:
+                errors += 1
+        elapsed = time.perf_counter() - started
+
+        timings.sort()
+        return {
+            'requests': requests,
+            'errors': errors,
+            'p50_ms': round(percentile(timings, 0.50), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3),
+            'mean_ms': round(statistics.mean(timings), 3) if timings else 0,
+            'throughput_rps': round(requests / elapsed, 1) if elapsed else 0,
+            'queries_per_request': (
+                round(queries / requests, 2) if requests else 0
+            ),
+            'cache': cache_stats.snapshot(),
+        }
+
+    def environment(self):
+        return {
+            'timestamp': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'replica_reads': False,
+        }
+
+    def report(self, results, baseline):
+        """
+        Write a table of the results, with changes against the baseline
+        """
+        if len(connections.databases) > 1:
+            self.stdout.write(
+                'Replica reads were off; every request used the primary.'
+            )
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{"scenario":<10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}'
+            f'{"req/s":>10}{"queries":>9}{"errors":>8}'
+        ))
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<10}{result["p50_ms"]:>10.2f}'
+                f'{result["p95_ms"]:>10.2f}{result["p99_ms"]:>10.2f}'
+                f'{result["throughput_rps"]:>10.1f}'
+                f'{result["queries_per_request"]:>9.2f}'
+                f'{result["errors"]:>8}'
+            )
+            previous = (baseline or {}).get(name)
+            if previous:
+                self.stdout.write('  vs baseline: ' + ', '.join(
+                    f'{key} {self.change(previous.get(key), result[key])}'
+                    for key in ('p50_ms', 'p95_ms', 'p99_ms',
+                                'throughput_rps', 'queries_per_request')
+                ))
+
+    def change(self, before, after):
+        if not before:
+            return 'n/a'
+        return f'{(after - before) / before:+.1%}'
@@ -0,0 +1,170 @@
+"""
+Django command to benchmark the recipe list query with and without indexes.
+"""
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models
+
+from core.models import Recipe
+
+
+BENCH_EMAIL = 'bench-{}@benchmark.invalid'
+
+# Stands in for the benchmarked index while it is dropped on MySQL, where
+# the user foreign key needs some index leading with user_id
+FK_INDEX = models.Index(fields=['user'], name='core_recipe_bench_user_idx')
+
+
+class Command(BaseCommand):
+    """
+    Seed a large recipe table and report EXPLAIN output and latency of the
+    per-user list query before and after an index is applied.
+    """
+    help = (
+        'Seed recipes, then time the per-user recipe list query with and '
+        'without the given index.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=100000,
+            help='Total number of recipes to seed.'
+        )
+        parser.add_argument(
+            '--users', type=int, default=10,
+            help='Number of users the seeded recipes are spread across.'
+        )
+        parser.add_argument(
+            '--page-size', type=int, default=50,
+            help='Number of rows fetched by each query.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Number of timed runs per phase.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Rows per INSERT while seeding.'
+        )
+        parser.add_argument(
+            '--index', default='core_recipe_user_id_desc_idx',
+            help='Name of the Recipe index to benchmark.'
+        )
+        parser.add_argument(
+            '--keep', action='store_true',
+            help='Keep the seeded rows after the run.'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Entrypoint for command.
+        """
+        index = self.get_index(options['index'])
+        users = self.seed(
+            options['rows'], options['users'], options['batch_size']
+        )
+        # The first user holds the largest share of rows.
+        queryset = Recipe.objects.filter(
+            user=users[0]
+        ).order_by('-id')[:options['page_size']]
+
+        # InnoDB refuses to drop the index a foreign key relies on (1553)
+        # unless another index can serve it
+        fk_index = FK_INDEX if connection.vendor == 'mysql' else None
+        try:
+            with connection.schema_editor() as editor:
+                if fk_index is not None:
+                    editor.add_index(Recipe, fk_index)
+                editor.remove_index(Recipe, index)
+            before = self.measure(queryset, options['repeat'])
+        finally:
+            with connection.schema_editor() as editor:
+                editor.add_index(Recipe, index)
+                if fk_index is not None:
+                    editor.remove_index(Recipe, fk_index)
+        after = self.measure(queryset, options['repeat'])
+
+        self.report(f'Before: without index {index.name}', before)
+        self.report(f'After: with index {index.name}', after)
+
+        if not options['keep']:
+            get_user_model().objects.filter(pk__in=users).delete()
+
+    def get_index(self, name):
+        """
+        Return the Recipe index with the given name
+        """
+        for index in Recipe._meta.indexes:
+            if index.name == name:
+                return index
+
+        raise CommandError(f'Recipe has no index named {name!r}.')
+
+    def seed(self, rows, users, batch_size):
+        """
+        Create the benchmark users and their recipes, return the user ids
+        """
+        self.stdout.write(f'Seeding {rows} recipes for {users} users...')
+        user_model = get_user_model()
+        password = make_password(None)
+        user_model.objects.bulk_create([
+            user_model(email=BENCH_EMAIL.format(i), password=password)
+            for i in range(users)
+        ], ignore_conflicts=True)
+        user_ids = list(user_model.objects.filter(
+            email__in=[BENCH_EMAIL.format(i) for i in range(users)]
+        ).order_by('email').values_list('id', flat=True))
+
+        # Half of the rows go to the first user, the rest round-robin.
+        batch = []
+        for i in range(rows):
+            if i % 2 == 0:
+                user_id = user_ids[0]
+            else:
+                user_id = user_ids[(i // 2) % len(user_ids)]
+            batch.append(Recipe(
+                user_id=user_id,
+                title=f'Benchmark recipe {i}',
+                time_minutes=i % 180,
+                price=i % 100,
+            ))
+            if len(batch) >= batch_size:
+                Recipe.objects.bulk_create(batch)
+                batch = []
+        Recipe.objects.bulk_create(batch)
+
+        return user_ids
+
+    def measure(self, queryset, repeat):
+        """
+        Return the EXPLAIN output and timings in ms for the queryset
+        """
+        plan = queryset.explain()
+        timings = []
+        for _ in range(repeat):
+            # A fresh clone each run, or the result cache answers
+            fresh = queryset.all()
+            start = time.perf_counter()
+            list(fresh)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        return plan, timings
+
+    def report(self, heading, result):
+        """
+        Write the plan and latency summary for one phase
+        """
+        plan, timings = result
+        self.stdout.write(self.style.MIGRATE_HEADING(heading))
+        self.stdout.write(plan)
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f'median {statistics.median(timings):.3f} ms, '
+            f'p95 {p95:.3f} ms, '
+            f'min {timings[0]:.3f} ms over {len(timings)} runs'
+        )
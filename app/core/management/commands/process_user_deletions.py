@@ -0,0 +1,56 @@
+"""
+Django command to run scheduled user deletions.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.deletion import pending_user_deletions, run_user_deletion
+
+
+class Command(BaseCommand):
+    """
+    Run pending user deletion jobs, resuming interrupted and failed ones.
+
+    Meant to run from cron, or continuously with --poll. Several workers
+    may run at once; each job is leased to one of them.
+    """
+    help = 'Delete users scheduled for deletion, with their recipes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int,
+            help='Run at most this many jobs.'
+        )
+        parser.add_argument(
+            '--poll', type=float,
+            help='Keep running, checking for new jobs every POLL seconds.'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Entrypoint for command.
+        """
+        while True:
+            self.run_jobs(options['limit'])
+            if not options['poll']:
+                return
+            time.sleep(options['poll'])
+
+    def run_jobs(self, limit):
+        jobs = pending_user_deletions()
+        if limit:
+            jobs = jobs[:limit]
+
+        for job in list(jobs):
+            self.stdout.write(f'Deleting {job.email}...')
+            try:
+                if not run_user_deletion(job):
+                    self.stdout.write('Taken by another worker.')
+                    continue
+            except Exception as exc:
+                self.stderr.write(f'Failed: {exc!r}')
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f'Deleted {job.email} and {job.recipes_deleted} recipes.'
+            ))
@@ -0,0 +1,58 @@
+"""
+Django command to recompute the precomputed recipe statistics.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import rebuild_recipe_stats
+
+
+class Command(BaseCommand):
+    """
+    Recompute RecipeStats from the recipes, one chunk of user ids at a
+    time, creating the rows of users that have none.
+
+    Used to backfill after bulk loads that bypass the ORM and to repair
+    drift. Each chunk is rebuilt in its own short transaction.
+    """
+    help = 'Recompute the recipe statistics of every user, or of --user.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of users rebuilt per statement.'
+        )
+        parser.add_argument(
+            '--user', type=int, action='append', dest='user_ids',
+            help='Only rebuild this user id, may be repeated.'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Entrypoint for command.
+        """
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+        users = get_user_model()._base_manager.order_by('pk')
+        if options['user_ids']:
+            users = users.filter(pk__in=options['user_ids'])
+
+        rebuilt = 0
+        last_id = 0
+        while True:
+            chunk = list(users.filter(pk__gt=last_id).values_list(
+                'pk', flat=True
+            )[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1]
+
+            with transaction.atomic():
+                rebuilt += rebuild_recipe_stats(chunk)
+            self.stdout.write(f'Rebuilt {rebuilt} users...')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt the recipe statistics of {rebuilt} users.'
+        ))
@@ -0,0 +1,77 @@
+"""
+Django command to repair drift in the per-user recipe counts.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from core.models import Recipe, recount_recipes
+
+
+class Command(BaseCommand):
+    """
+    Compare User.recipe_count with the actual recipes, one chunk of user
+    ids at a time, and recount the users that drifted.
+
+    Each chunk is checked and repaired in its own short transaction, so
+    the command can run against a live database.
+    """
+    help = 'Find and repair users whose recipe_count has drifted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of users checked per query.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report drifted users without repairing them.'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Entrypoint for command.
+        """
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+        users = get_user_model()._base_manager.order_by('pk')
+
+        checked = drifted = 0
+        last_id = 0
+        while True:
+            chunk = list(users.filter(pk__gt=last_id).values_list(
+                'pk', flat=True
+            )[:options['chunk_size']])
+            if not chunk:
+                break
+            last_id = chunk[-1]
+            checked += len(chunk)
+
+            with transaction.atomic():
+                user_ids = self.drifted(users.filter(pk__in=chunk))
+                if user_ids and not options['dry_run']:
+                    recount_recipes(user_ids)
+            drifted += len(user_ids)
+
+        action = 'Found' if options['dry_run'] else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} users. {action} {drifted} drifted counts.'
+        ))
+
+    def drifted(self, users):
+        """
+        Return the ids of users whose stored count differs from the actual
+        """
+        counts = Recipe._base_manager.filter(
+            user=OuterRef('pk')
+        ).order_by().values('user').annotate(count=Count('id')).values('count')
+
+        rows = users.annotate(actual=Coalesce(
+            Subquery(counts), 0, output_field=IntegerField()
+        )).values_list('pk', 'recipe_count', 'actual')
+
+        return [
+            user_id for user_id, stored, actual in rows if stored != actual
+        ]
@@ -1,32 +1,111 @@
 """
 Django command to wait for the database to be available to connect.
 """
+import random
 import time
+from concurrent.futures import ThreadPoolExecutor
 
-from MySQLdb import OperationalError as MySqlError
-from django.db.utils import OperationalError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
 
-from django.core.management.base import BaseCommand
+from core.db.errors import connection_errors
 
 
 class Command(BaseCommand):
     """
     Django command to wait for database
     """
+    help = (
+        'Wait until every database accepts connections, retrying with '
+        'exponential backoff.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', action='append', dest='databases',
+            help='Database alias to wait for, may be repeated. Defaults to '
+                 'every configured database.'
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=300,
+            help='Seconds to wait in total before giving up, 0 to wait '
+                 'forever.'
+        )
+        parser.add_argument(
+            '--initial-delay', type=float, default=0.5,
+            help='Seconds to wait after the first failed attempt.'
+        )
+        parser.add_argument(
+            '--max-delay', type=float, default=10,
+            help='Upper bound of the wait between attempts.'
+        )
 
     def handle(self, *args, **options):
         """
         Entrypoint for command.
         """
         self.stdout.write('Waiting for database...')
-        db_active = False
+        pending = options['databases'] or list(connections)
+        timeout = options['timeout']
+        deadline = time.monotonic() + timeout if timeout else None
+        delay = options['initial_delay']
+
+        while True:
+            errors = self.probe_all(pending)
+            pending = [alias for alias in pending if alias in errors]
+            if not pending:
+                break
+
+            remaining = (
+                deadline - time.monotonic() if deadline is not None
+                else None
+            )
+            if remaining is not None and remaining <= 0:
+                failures = ', '.join(
+                    f'{alias} ({errors[alias]})' for alias in pending
+                )
+                raise CommandError(
+                    f'Database unavailable after {timeout:g} seconds: '
+                    f'{failures}'
+                )
 
-        while db_active is False:
-            try:
-                self.check(databases=['default'])
-                db_active = True
-            except (MySqlError, OperationalError):
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
+            # Equal jitter keeps restarted containers from retrying in step
+            wait = delay / 2 + random.uniform(0, delay / 2)
+            if remaining is not None:
+                wait = min(wait, remaining)
+            self.stdout.write(
+                f'Database unavailable ({", ".join(pending)}), '
+                f'waiting {wait:.1f} seconds...'
+            )
+            time.sleep(wait)
+            delay = min(delay * 2, options['max_delay'])
 
         self.stdout.write(self.style.SUCCESS('Database available!'))
+
+    def probe_all(self, aliases):
+        """
+        Probe the databases concurrently and return errors by alias.
+
+        Each probe runs in a worker thread, so its connection is its own
+        and is closed once the probe is done.
+        """
+        with ThreadPoolExecutor(max_workers=len(aliases)) as executor:
+            results = list(executor.map(self.probe, aliases))
+
+        return {
+            alias: error
+            for alias, error in zip(aliases, results) if error is not None
+        }
+
+    def probe(self, alias):
+        """
+        Return None if the database is reachable, else the error.
+        """
+        try:
+            self.check(databases=[alias])
+        except connection_errors(alias) as error:
+            return error
+        finally:
+            connections[alias].close()
+
+        return None
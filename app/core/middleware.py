@@ -0,0 +1,284 @@
+"""
+Middleware for the API
+"""
+import cProfile
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from rest_framework.exceptions import APIException
+
+from core.conf import get_settings
+from user.authentication import CachedTokenAuthentication
+
+
+logger = logging.getLogger('core.timing')
+profiling_logger = logging.getLogger('core.profiling')
+
+DEFAULT_SERVER_TIMING = {
+    'ENABLED': False,
+    'HEADER': True,  # send a Server-Timing response header
+    'LOG': True,  # log timings as JSON to the core.timing logger
+    'LOG_THRESHOLD_MS': 0,  # only log requests slower than this
+}
+
+DEFAULT_REQUEST_PROFILING = {
+    'ENABLED': False,
+    'DIRECTORY': '/tmp/profiles',
+    'HEADER': 'X-Profile',  # send "X-Profile: 1" or ?profile=1
+    'QUERY_PARAM': 'profile',
+    'RATE_LIMIT': 10,  # requests profiled per period across processes
+    'RATE_PERIOD': 3600,
+    'MAX_DIRECTORY_BYTES': 100 * 1024 * 1024,
+    'CACHE_ALIAS': 'default',
+}
+
+
+class RequestTiming:
+    """
+    Timestamps and SQL totals of one request
+
+    Instances are installed as execute wrappers on every connection, so
+    each query is counted and timed.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.view_start = None
+        self.view_end = None
+        self.queries = 0
+        self.sql_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - start
+
+    def metrics(self, end):
+        """
+        Return the durations of the request in milliseconds
+
+        Rendering only has its own duration for template responses, such
+        as DRF's, which are rendered after the view returns.
+        """
+        view_start = self.view_start or end
+        view_end = self.view_end or end
+        return {
+            'queries': self.queries,
+            'db_ms': round(self.sql_time * 1000, 3),
+            'view_ms': round((view_end - view_start) * 1000, 3),
+            'render_ms': round((end - view_end) * 1000, 3),
+            'total_ms': round((end - self.start) * 1000, 3),
+        }
+
+
+def server_timing_header(metrics):
+    return (
+        f'db;dur={metrics["db_ms"]};desc="{metrics["queries"]} queries", '
+        f'view;dur={metrics["view_ms"]}, '
+        f'render;dur={metrics["render_ms"]}, '
+        f'total;dur={metrics["total_ms"]}'
+    )
+
+
+class ServerTimingMiddleware:
+    """
+    Report query count, SQL, view, render and total time of each request
+
+    Enabled by SERVER_TIMING['ENABLED']; when disabled the middleware is
+    removed from the chain at startup. Timings are sent in a
+    Server-Timing header and logged as JSON to the core.timing logger.
+    Place it first in MIDDLEWARE so the total covers other middleware.
+    Queries made from other threads, as by the async views, are not seen.
+    """
+
+    def __init__(self, get_response):
+        options = get_settings('SERVER_TIMING', DEFAULT_SERVER_TIMING)
+        if not options['ENABLED']:
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+        self.header = options['HEADER']
+        self.log = options['LOG']
+        self.log_threshold = options['LOG_THRESHOLD_MS']
+
+    def __call__(self, request):
+        timing = request._server_timing = RequestTiming()
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timing))
+            response = self.get_response(request)
+
+        metrics = timing.metrics(time.perf_counter())
+        if self.header:
+            response['Server-Timing'] = server_timing_header(metrics)
+        if self.log and metrics['total_ms'] >= self.log_threshold:
+            self.log_request(request, response, metrics)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._server_timing.view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        request._server_timing.view_end = time.perf_counter()
+        return response
+
+    def log_request(self, request, response, metrics):
+        match = request.resolver_match
+        data = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            **metrics,
+        }
+        logger.info(json.dumps(data), extra={'timing': data})
+
+
+class ProfilingMiddleware:
+    """
+    Profile single requests on demand and save the stats for staff users
+
+    Enabled by REQUEST_PROFILING['ENABLED']. A request sending the
+    profiling header or query flag is authenticated up front with an API
+    token or the admin session. Only staff requests run under cProfile,
+    one at a time per process, and count against the shared rate limit.
+    The stats are written while the directory size cap allows and the
+    file name is returned in the X-Profile-Id header; load it with
+    pstats or snakeviz.
+    """
+
+    def __init__(self, get_response):
+        options = get_settings('REQUEST_PROFILING', DEFAULT_REQUEST_PROFILING)
+        if not options['ENABLED']:
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+        self.options = options
+        self.header = 'HTTP_' + options['HEADER'].upper().replace('-', '_')
+        self._lock = threading.Lock()
+
+    def __call__(self, request):
+        if not self.requested(request):
+            return self.get_response(request)
+        user = self.authenticate(request)
+        if user is None or not user.is_staff:
+            return self.get_response(request)
+        if not self._lock.acquire(blocking=False):
+            return self.get_response(request)
+
+        try:
+            if not self.take_slot(request):
+                return self.get_response(request)
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        finally:
+            self._lock.release()
+
+        name = self.save(request, user, profiler)
+        if name is not None:
+            response['X-Profile-Id'] = name
+
+        return response
+
+    def requested(self, request):
+        flag = (
+            request.META.get(self.header) or
+            request.GET.get(self.options['QUERY_PARAM'])
+        )
+        return flag in ('1', 'true', 'yes')
+
+    def authenticate(self, request):
+        """
+        Return the user a flagged request authenticates as, or None
+
+        Checks API tokens, whose lookups are cached, then the session
+        user set by AuthenticationMiddleware. Signed tokens carry no staff
+        flag and are ignored. The request itself is left untouched; the
+        view authenticates it again as usual.
+        """
+        try:
+            result = CachedTokenAuthentication().authenticate(request)
+        except APIException:
+            return None
+        if result is not None:
+            return result[0]
+
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return user
+        return None
+
+    def rate_key(self):
+        window = int(time.time() // self.options['RATE_PERIOD'])
+        return f'profiling:count:{window}'
+
+    def take_slot(self, request):
+        """
+        Count a profiled request, returning False over the rate limit
+        """
+        cache = caches[self.options['CACHE_ALIAS']]
+        key = self.rate_key()
+        cache.add(key, 0, self.options['RATE_PERIOD'])
+        try:
+            count = cache.incr(key)
+        except ValueError:
+            # The window's key expired between add() and incr()
+            cache.set(key, 1, self.options['RATE_PERIOD'])
+            count = 1
+        if count > self.options['RATE_LIMIT']:
+            profiling_logger.warning(
+                'Profile of %s skipped, rate limit reached', request.path
+            )
+            return False
+        return True
+
+    def directory_size(self, directory):
+        with os.scandir(directory) as entries:
+            return sum(
+                entry.stat().st_size for entry in entries
+                if entry.is_file() and entry.name.endswith('.prof')
+            )
+
+    def save(self, request, user, profiler):
+        """
+        Write the stats and return the file name, or None if not allowed
+        """
+        directory = self.options['DIRECTORY']
+        os.makedirs(directory, exist_ok=True)
+        if self.directory_size(directory) >= \
+                self.options['MAX_DIRECTORY_BYTES']:
+            profiling_logger.warning(
+                'Profile of %s discarded, %s is full', request.path, directory
+            )
+            return None
+
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-')
+        name = (
+            f'{time.strftime("%Y%m%d-%H%M%S")}-{request.method}-{slug}-'
+            f'{user.pk}-{uuid.uuid4().hex[:8]}.prof'
+        )
+        profiler.dump_stats(os.path.join(directory, name))
+        profiling_logger.info(
+            'Profile of %s written to %s', request.path, name
+        )
+
+        return name
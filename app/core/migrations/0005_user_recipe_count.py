@@ -0,0 +1,42 @@
+# Generated by Django 3.2.25 on 2026-10-18 05:10
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+CHUNK_SIZE = 10000
+
+
+def count_recipes(apps, schema_editor):
+    """
+    Backfill recipe_count in chunks of user ids
+    """
+    User = apps.get_model('core', 'User')
+    Recipe = apps.get_model('core', 'Recipe')
+    db = schema_editor.connection.alias
+
+    counts = Recipe.objects.using(db).filter(
+        user=OuterRef('pk')
+    ).order_by().values('user').annotate(count=Count('id')).values('count')
+    last = User.objects.using(db).aggregate(last=Max('id'))['last'] or 0
+    for start in range(0, last + 1, CHUNK_SIZE):
+        User.objects.using(db).filter(
+            pk__gte=start, pk__lt=start + CHUNK_SIZE
+        ).update(recipe_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_recipe_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_recipes, migrations.RunPython.noop),
+    ]
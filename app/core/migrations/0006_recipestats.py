@@ -0,0 +1,94 @@
+# Generated by Django 3.2.25 on 2026-10-18 05:07
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+CHUNK_SIZE = 10000
+
+# Column of each time_minutes bucket and its [lower, upper) bounds, as in
+# core.models.TIME_BUCKETS when this migration was written
+TIME_BUCKETS = (
+    ('time_under_15', None, 15),
+    ('time_15_to_30', 15, 30),
+    ('time_30_to_60', 30, 60),
+    ('time_60_to_120', 60, 120),
+    ('time_120_plus', 120, None),
+)
+
+
+def build_stats(apps, schema_editor):
+    """
+    Create and fill the stats row of every user in chunks of user ids
+    """
+    User = apps.get_model('core', 'User')
+    Recipe = apps.get_model('core', 'Recipe')
+    RecipeStats = apps.get_model('core', 'RecipeStats')
+    db = schema_editor.connection.alias
+
+    recipes = Recipe.objects.using(db).filter(
+        user=OuterRef('pk')
+    ).order_by().values('user')
+
+    def aggregate(expression):
+        return Subquery(recipes.annotate(value=expression).values('value'))
+
+    values = {
+        'count': Coalesce(aggregate(Count('id')), 0),
+        'price_total': Coalesce(
+            aggregate(Sum('price')), models.Value(Decimal('0.00'))
+        ),
+        'price_min': aggregate(Min('price')),
+        'price_max': aggregate(Max('price')),
+    }
+    for column, lower, upper in TIME_BUCKETS:
+        condition = Q()
+        if lower is not None:
+            condition &= Q(time_minutes__gte=lower)
+        if upper is not None:
+            condition &= Q(time_minutes__lt=upper)
+        values[column] = Coalesce(
+            aggregate(Count('id', filter=condition)), 0
+        )
+
+    last = User.objects.using(db).aggregate(last=Max('id'))['last'] or 0
+    for start in range(0, last + 1, CHUNK_SIZE):
+        user_ids = User.objects.using(db).filter(
+            pk__gte=start, pk__lt=start + CHUNK_SIZE
+        ).values_list('pk', flat=True)
+        RecipeStats.objects.using(db).bulk_create(
+            [RecipeStats(user_id=user_id) for user_id in user_ids],
+            ignore_conflicts=True
+        )
+        RecipeStats.objects.using(db).filter(
+            pk__gte=start, pk__lt=start + CHUNK_SIZE
+        ).update(**values)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_user_recipe_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recipe_stats', serialize=False, to='core.user')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('price_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('price_min', models.DecimalField(decimal_places=2, max_digits=5, null=True)),
+                ('price_max', models.DecimalField(decimal_places=2, max_digits=5, null=True)),
+                ('time_under_15', models.PositiveIntegerField(default=0)),
+                ('time_15_to_30', models.PositiveIntegerField(default=0)),
+                ('time_30_to_60', models.PositiveIntegerField(default=0)),
+                ('time_60_to_120', models.PositiveIntegerField(default=0)),
+                ('time_120_plus', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(build_stats, migrations.RunPython.noop),
+    ]
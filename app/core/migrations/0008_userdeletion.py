@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-18 05:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_recipe_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='pending', max_length=16)),
+                ('recipes_total', models.PositiveIntegerField(default=0)),
+                ('recipes_deleted', models.PositiveIntegerField(default=0)),
+                ('lease_expires', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('requested_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.OneToOneField(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='deletion', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -1,15 +1,35 @@
 """
 Database models
 """
+from collections import Counter
+from decimal import Decimal
+
 from django.conf import settings
 
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    Max,
+    Min,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When
+)
+from django.db.models.functions import Cast, Coalesce, Greatest, Least
+from django.contrib.auth import get_user_model
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin
 )
 
+from core.signals import recipes_changed
+
 
 class UserManager(BaseUserManager):
     """
@@ -51,11 +71,257 @@ class User(AbstractBaseUser, PermissionsMixin):
     name = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # Maintained by Recipe and RecipeQuerySet, see adjust_recipe_counts()
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
 
     objects = UserManager()  # assign user manager to user model
 
     USERNAME_FIELD = 'email'
 
+    def save(self, *args, **kwargs):
+        """
+        Save the user without overwriting recipe_count
+
+        The counter only changes through UPDATE expressions, so a user
+        loaded earlier would otherwise write back a stale count.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'recipe_count'
+            ]
+        super().save(*args, **kwargs)
+
+
+# Recipe fields summarised by RecipeStats, and the values_list() columns
+# of the (user_id, price, time_minutes) rows the maintenance works on
+STATS_FIELD_NAMES = frozenset({'user', 'user_id', 'price', 'time_minutes'})
+STATS_COLUMNS = ('user_id', 'price', 'time_minutes')
+
+# Exclusive upper bound of each time_minutes histogram bucket and the
+# RecipeStats column counting it; the last bucket is open ended
+TIME_BUCKETS = (
+    (15, 'time_under_15'),
+    (30, 'time_15_to_30'),
+    (60, 'time_30_to_60'),
+    (120, 'time_60_to_120'),
+    (None, 'time_120_plus'),
+)
+
+
+def time_bucket(minutes):
+    """
+    Return the RecipeStats column counting recipes of this duration
+    """
+    for upper, column in TIME_BUCKETS:
+        if upper is None or minutes < upper:
+            return column
+
+
+def shifted(name, delta):
+    """
+    Return an expression adding delta to a counter, never below zero
+    """
+    if delta > 0:
+        return F(name) + delta
+    # Unsigned columns reject negative intermediate results
+    return Case(
+        When(**{f'{name}__gt': -delta}, then=F(name) + delta),
+        default=Value(0)
+    )
+
+
+def adjust_recipe_counts(changes, using=None):
+    """
+    Apply recipe count changes, a mapping of user id to delta
+
+    Users with the same delta are updated with one UPDATE, and counts
+    never drop below zero.
+    """
+    by_delta = {}
+    for user_id, delta in changes.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(user_id)
+
+    users = get_user_model()._base_manager.using(using)
+    for delta, user_ids in by_delta.items():
+        users.filter(pk__in=user_ids).update(
+            recipe_count=shifted('recipe_count', delta)
+        )
+
+
+def recount_recipes(user_ids, using=None):
+    """
+    Set the recipe count of users to their actual number of recipes
+    """
+    counts = Recipe._base_manager.using(using).filter(
+        user=OuterRef('pk')
+    ).order_by().values('user').annotate(count=Count('id')).values('count')
+    return get_user_model()._base_manager.using(using).filter(
+        pk__in=user_ids
+    ).update(recipe_count=Coalesce(Subquery(counts), 0))
+
+
+def send_recipes_changed(user_ids, using=None):
+    """
+    Send recipes_changed for users whose recipes were written
+    """
+    user_ids = frozenset(user_ids)
+    if user_ids:
+        recipes_changed.send(sender=Recipe, user_ids=user_ids, using=using)
+
+
+def apply_recipe_changes(removed=(), added=(), using=None):
+    """
+    Update recipe counts and stats for removed and added recipe rows
+
+    Rows are (user_id, price, time_minutes) tuples as read before and
+    after a write; rows present on both sides cancel out of the counts
+    and stats, but their users are still sent recipes_changed.
+    """
+    removed, added = Counter(removed), Counter(added)
+    send_recipes_changed(
+        {row[0] for row in removed} | {row[0] for row in added},
+        using=using
+    )
+    removed, added = removed - added, added - removed
+
+    counts = Counter()
+    changes = {}
+    for rows, sign in ((removed, -1), (added, 1)):
+        for (user_id, price, minutes), number in rows.items():
+            counts[user_id] += sign * number
+            if user_id not in changes:
+                changes[user_id] = RecipeStatsChange(user_id)
+            changes[user_id].add(price, minutes, sign * number)
+
+    adjust_recipe_counts(counts, using=using)
+
+    stats = RecipeStats._base_manager.using(using)
+    missing = [
+        user_id for user_id, change in changes.items()
+        if not stats.filter(pk=user_id).update(**change.values())
+    ]
+    if missing:
+        rebuild_recipe_stats(missing, using=using)
+
+
+def rebuild_recipe_stats(user_ids, using=None):
+    """
+    Recompute the RecipeStats rows of users from their recipes
+
+    Rows are created for users without one, including users without
+    recipes, and filled by one UPDATE with a subquery per column.
+    """
+    RecipeStats._base_manager.using(using).bulk_create(
+        [RecipeStats(user_id=user_id) for user_id in user_ids],
+        ignore_conflicts=True
+    )
+
+    recipes = Recipe._base_manager.using(using).filter(
+        user=OuterRef('pk')
+    ).order_by().values('user')
+
+    def aggregate(expression):
+        return Subquery(recipes.annotate(value=expression).values('value'))
+
+    values = {
+        'count': Coalesce(aggregate(Count('id')), 0),
+        'price_total': Coalesce(
+            aggregate(Sum('price')), Value(Decimal('0.00'))
+        ),
+        'price_min': aggregate(Min('price')),
+        'price_max': aggregate(Max('price')),
+    }
+    lower = None
+    for upper, column in TIME_BUCKETS:
+        condition = Q()
+        if lower is not None:
+            condition &= Q(time_minutes__gte=lower)
+        if upper is not None:
+            condition &= Q(time_minutes__lt=upper)
+        values[column] = Coalesce(
+            aggregate(Count('id', filter=condition)), 0
+        )
+        lower = upper
+
+    return RecipeStats._base_manager.using(using).filter(
+        pk__in=user_ids
+    ).update(**values)
+
+
+class RecipeQuerySet(models.QuerySet):
+    """
+    Queryset keeping User.recipe_count and RecipeStats in step with bulk
+    changes, and sending recipes_changed for them
+    """
+
+    def stats_rows(self):
+        """
+        Return the locked (user_id, price, time_minutes) rows
+        """
+        return list(self.order_by().select_for_update().values_list(
+            *STATS_COLUMNS
+        ))
+
+    def bulk_create(self, objs, batch_size=None, ignore_conflicts=False):
+        objs = list(objs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            created = super().bulk_create(
+                objs, batch_size=batch_size, ignore_conflicts=ignore_conflicts
+            )
+            if ignore_conflicts:
+                # Skipped rows are not reported, so count from scratch
+                user_ids = list({obj.user_id for obj in objs})
+                recount_recipes(user_ids, using=self.db)
+                rebuild_recipe_stats(user_ids, using=self.db)
+                send_recipes_changed(user_ids, using=self.db)
+            else:
+                apply_recipe_changes(
+                    added=[obj.stats_row() for obj in objs], using=self.db
+                )
+
+        return created
+
+    def update(self, **kwargs):
+        # Also reached by bulk_update(), which updates through filter()
+        if not STATS_FIELD_NAMES.intersection(kwargs):
+            user_ids = list(self.order_by().values_list(
+                'user_id', flat=True
+            ).distinct())
+            result = super().update(**kwargs)
+            send_recipes_changed(user_ids, using=self.db)
+            return result
+
+        with transaction.atomic(using=self.db, savepoint=False):
+            rows = list(self.order_by().select_for_update().values_list(
+                'pk', *STATS_COLUMNS
+            ))
+            result = super().update(**kwargs)
+            # Values may be expressions, so read back what was written
+            added = self.model._base_manager.using(self.db).filter(
+                pk__in=[row[0] for row in rows]
+            ).values_list(*STATS_COLUMNS)
+            apply_recipe_changes(
+                [row[1:] for row in rows], list(added), using=self.db
+            )
+
+        return result
+
+    update.alters_data = True
+
+    def delete(self):
+        with transaction.atomic(using=self.db, savepoint=False):
+            # Lock the rows so the changes match what is deleted
+            removed = self.stats_rows()
+            result = super().delete()
+            apply_recipe_changes(removed=removed, using=self.db)
+
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
 
 class Recipe(models.Model):
     """
@@ -70,6 +336,248 @@ class Recipe(models.Model):
     time_minutes = models.IntegerField()
     price = models.DecimalField(max_digits=5, decimal_places=2)
     link = models.CharField(max_length=255, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = RecipeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Serves the per-user listing, filter(user=...).order_by('-id'),
+            # straight from the index without a filesort.
+            models.Index(
+                fields=['user', '-id'],
+                name='core_recipe_user_id_desc_idx'
+            ),
+            # Lets MAX(updated_at) per user be read from the index.
+            models.Index(
+                fields=['user', 'updated_at'],
+                name='core_recipe_user_updated_idx'
+            ),
+            # Serve the admin's ^title search and updated_at filter.
+            models.Index(fields=['title'], name='core_recipe_title_idx'),
+            models.Index(
+                fields=['updated_at'],
+                name='core_recipe_updated_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
+
+    def stats_row(self):
+        """
+        Return the (user_id, price, time_minutes) row summarised in stats
+        """
+        return (
+            self.user_id,
+            self._meta.get_field('price').to_python(self.price),
+            self.time_minutes
+        )
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and \
+                not STATS_FIELD_NAMES.intersection(update_fields):
+            super().save(*args, **kwargs)
+            send_recipes_changed([self.user_id], using=self._state.db)
+            return
+
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self
+        )
+        with transaction.atomic(using=using, savepoint=False):
+            removed = [] if self._state.adding else type(
+                self
+            ).objects.using(using).filter(pk=self.pk).stats_rows()
+            super().save(*args, **kwargs)
+            apply_recipe_changes(removed, [self.stats_row()], using=using)
+
+    def delete(self, using=None, keep_parents=False):
+        using = using or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            removed = type(self).objects.using(using).filter(
+                pk=self.pk
+            ).stats_rows()
+            result = super().delete(using=using, keep_parents=keep_parents)
+            apply_recipe_changes(removed=removed, using=using)
+
+        return result
+
+
+class RecipeStats(models.Model):
+    """
+    Aggregates of a user's recipes, maintained on every recipe write
+
+    Rows are adjusted with F() deltas in the transaction of the write, see
+    apply_recipe_changes(), and recomputed by rebuild_recipe_stats().
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='recipe_stats'
+    )
+    count = models.PositiveIntegerField(default=0)
+    price_total = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal('0.00')
+    )
+    price_min = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True
+    )
+    price_max = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True
+    )
+    time_under_15 = models.PositiveIntegerField(default=0)
+    time_15_to_30 = models.PositiveIntegerField(default=0)
+    time_30_to_60 = models.PositiveIntegerField(default=0)
+    time_60_to_120 = models.PositiveIntegerField(default=0)
+    time_120_plus = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'Recipe stats of user {self.user_id}'
+
+    @property
+    def price_average(self):
+        if not self.count:
+            return None
+        return self.price_total / self.count
+
+    def time_histogram(self):
+        """
+        Return the recipe count of each time_minutes bucket
+        """
+        histogram = []
+        lower = 0
+        for upper, column in TIME_BUCKETS:
+            histogram.append({
+                'from': lower,
+                'to': upper,
+                'count': getattr(self, column),
+            })
+            lower = upper
+
+        return histogram
+
+
+class RecipeStatsChange:
+    """
+    Net change to the RecipeStats row of one user
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.counts = Counter()
+        self.total = Decimal('0.00')
+        self.low = None
+        self.high = None
+        self.removed_prices = set()
+
+    def add(self, price, minutes, number):
+        """
+        Account for number recipes added, or removed if negative
+        """
+        self.counts['count'] += number
+        self.counts[time_bucket(minutes)] += number
+        self.total += price * number
+        if number < 0:
+            self.removed_prices.add(price)
+        else:
+            self.low = price if self.low is None else min(self.low, price)
+            self.high = price if self.high is None else max(self.high, price)
+
+    def values(self):
+        """
+        Return the UPDATE values applying the change
+        """
+        values = {
+            name: shifted(name, delta)
+            for name, delta in self.counts.items() if delta
+        }
+        if self.total:
+            values['price_total'] = F('price_total') + self.total
+        values['price_min'] = self.extreme('price_min', Least, self.low, Min)
+        values['price_max'] = self.extreme(
+            'price_max', Greatest, self.high, Max
+        )
+
+        return values
+
+    def extreme(self, name, pick, added, aggregate):
+        """
+        Return the new price_min or price_max
+
+        Added prices are folded in directly. Only when a removed price
+        equals the stored extreme is it recomputed from the recipes,
+        which already reflect the write.
+        """
+        value = F(name)
+        if added is not None:
+            # Cast so the bound value compares as a number, not as text
+            added = Cast(
+                Value(added),
+                models.DecimalField(max_digits=5, decimal_places=2)
+            )
+            value = pick(Coalesce(F(name), added), added)
+        if self.removed_prices:
+            current = Recipe._base_manager.filter(
+                user=self.user_id
+            ).order_by().values('user').annotate(
+                value=aggregate('price')
+            ).values('value')
+            value = Case(
+                When(**{f'{name}__in': sorted(self.removed_prices)},
+                     then=Subquery(current)),
+                default=value
+            )
+
+        return value
+
+
+class UserDeletion(models.Model):
+    """
+    Job deleting a user and their recipes in chunks, see core.deletion
+
+    The job outlives the user, whose email is kept for the record.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='deletion'
+    )
+    email = models.EmailField(max_length=255)
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES, default=PENDING, db_index=True
+    )
+    recipes_total = models.PositiveIntegerField(default=0)
+    recipes_deleted = models.PositiveIntegerField(default=0)
+    # Held by the worker running the job so two never run it at once
+    lease_expires = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    requested_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'Deletion of {self.email}'
+
+    @property
+    def progress(self):
+        """
+        Return the fraction of the recipes deleted so far
+        """
+        if self.status == self.DONE:
+            return 1.0
+        if not self.recipes_total:
+            return 0.0
+        return min(self.recipes_deleted / self.recipes_total, 1.0)
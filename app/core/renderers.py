@@ -0,0 +1,57 @@
+"""
+Fast renderers for the API
+"""
+import msgpack
+import orjson
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+# Fallback for types orjson and msgpack do not serialize themselves,
+# e.g. Decimal, lazy translations and querysets, matching DRF's output.
+encoder_default = JSONEncoder().default
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSON renderer backed by orjson
+
+    Serializes datetime, date, time and UUID natively and falls back to
+    DRF's JSON encoder for everything else, such as Decimal. Line and
+    paragraph separators are escaped as DRF does. orjson only supports
+    two-space indenting, used whenever any indent is requested.
+    """
+    options = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        options = self.options
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            options |= orjson.OPT_INDENT_2
+
+        rendered = orjson.dumps(data, default=encoder_default, option=options)
+        # Escaped like DRF so the JSON is also valid JavaScript
+        return rendered.replace(
+            '\u2028'.encode(), b'\\u2028'
+        ).replace(
+            '\u2029'.encode(), b'\\u2029'
+        )
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Compact binary renderer, negotiated with Accept: application/msgpack
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        return msgpack.packb(data, default=encoder_default, use_bin_type=True)
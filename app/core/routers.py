@@ -0,0 +1,141 @@
+"""
+Database router sending selected reads to read replicas
+"""
+import contextlib
+import random
+from contextvars import ContextVar
+
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+from rest_framework.permissions import SAFE_METHODS
+
+from core.conf import get_settings
+
+
+DEFAULT_DATABASE_ROUTING = {
+    'REPLICAS': [],
+    'CACHE_ALIAS': 'default',
+    'PIN_TIMEOUT': 10,  # seconds a user reads the primary after a write
+}
+
+# Set while a request that may read stale data is being handled
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def replica_aliases():
+    options = get_settings('DATABASE_ROUTING', DEFAULT_DATABASE_ROUTING)
+    return options['REPLICAS']
+
+
+@contextlib.contextmanager
+def replica_reads():
+    """
+    Send reads made inside the block to a read replica
+    """
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def pin_key(user_id):
+    return f'db:pin:{user_id}'
+
+
+def pin_user(user_id):
+    """
+    Keep a user's reads on the primary until their writes have replicated
+    """
+    options = get_settings('DATABASE_ROUTING', DEFAULT_DATABASE_ROUTING)
+    if options['REPLICAS']:
+        caches[options['CACHE_ALIAS']].set(
+            pin_key(user_id), True, options['PIN_TIMEOUT']
+        )
+
+
+def is_pinned(user_id):
+    options = get_settings('DATABASE_ROUTING', DEFAULT_DATABASE_ROUTING)
+    return bool(caches[options['CACHE_ALIAS']].get(pin_key(user_id)))
+
+
+class ReplicaRouter:
+    """
+    Route reads inside replica_reads() to a random replica
+
+    Everything else, including every write, uses the primary; databases
+    other than the primary and its replicas are left alone. Replicas
+    are never migrated; they receive the primary's schema through
+    replication.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases()
+        if replicas and _replica_reads.get():
+            return random.choice(replicas)
+        return None
+
+    def routed_aliases(self):
+        return {DEFAULT_DB_ALIAS, *replica_aliases()}
+
+    def db_for_write(self, model, **hints):
+        instance = hints.get('instance')
+        if (instance is not None and instance._state.db is not None and
+                instance._state.db not in self.routed_aliases()):
+            # Objects of an unrelated database are written back to it
+            return None
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = self.routed_aliases()
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replica_aliases():
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """
+    Serve safe requests for replica_actions from a read replica
+
+    Actions are viewset actions, or lowercase method names on views
+    without actions. Users who wrote recently are pinned to the primary
+    so they read their own writes. Authentication runs before reads are
+    switched, so token lookups always see the primary.
+    """
+    replica_actions = ('list', 'retrieve')
+
+    def use_replica(self, request):
+        """
+        Return whether the request may read from a replica
+        """
+        action = getattr(self, 'action', request.method.lower())
+        return (
+            request.method in SAFE_METHODS and
+            action in self.replica_actions and
+            bool(replica_aliases()) and
+            not is_pinned(request.user.pk)
+        )
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.use_replica(request):
+            self._replica_token = _replica_reads.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _replica_reads.reset(token)
+            self._replica_token = None
+
+        if (request.method not in SAFE_METHODS and
+                response.status_code < 400 and
+                request.user.is_authenticated):
+            pin_user(request.user.pk)
+
+        return super().finalize_response(request, response, *args, **kwargs)
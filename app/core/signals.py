@@ -0,0 +1,9 @@
+"""
+Signals sent by the core models
+"""
+from django.dispatch import Signal
+
+
+# Sent with user_ids and using whenever recipes of those users are
+# written, including by bulk queryset methods that send no model signals
+recipes_changed = Signal()
@@ -2,10 +2,17 @@
 Test admin modifications
 """
 
+from unittest.mock import patch
+
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.test import Client
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.admin import EstimatedCountPaginator
+from core.models import Recipe, UserDeletion
 
 
 class AdminSiteTests(TestCase):
@@ -57,3 +64,113 @@ class AdminSiteTests(TestCase):
         res = self.client.get(url)
 
         self.assertEqual(res.status_code, 200)
+
+    def create_recipes(self, user, count):
+        Recipe.objects.bulk_create([
+            Recipe(user=user, title=f'Recipe {i}', time_minutes=5, price=1)
+            for i in range(count)
+        ])
+
+    def test_user_list_recipe_count(self):
+        """
+        Test recipe counts are listed without a query per user
+        """
+        self.create_recipes(self.user, 3)
+        url = reverse('admin:core_user_changelist')
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+
+        for i in range(5):
+            get_user_model().objects.create_user(
+                email=f'user{i}@example.com', password='testpass123'
+            )
+        with self.assertNumQueries(len(context.captured_queries)):
+            res = self.client.get(url)
+
+        self.assertContains(res, '<td class="field-recipe_count">3</td>')
+
+    def test_recipe_list(self):
+        """
+        Test the recipe list loads users with the recipes
+        """
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testpass123'
+        )
+        self.create_recipes(self.user, 2)
+        self.create_recipes(other, 2)
+        url = reverse('admin:core_recipe_changelist')
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+
+        self.create_recipes(other, 5)
+        with self.assertNumQueries(len(context.captured_queries)):
+            res = self.client.get(url)
+
+        self.assertContains(res, 'other@example.com')
+        self.assertContains(res, '9 recipes')
+
+    @patch('core.admin.estimated_count', return_value=123456)
+    def test_recipe_list_uses_estimate(self, estimated_count):
+        """
+        Test a large unfiltered list shows the estimated count
+        """
+        res = self.client.get(reverse('admin:core_recipe_changelist'))
+
+        self.assertContains(res, '123456 recipes')
+        estimated_count.assert_called_once_with(Recipe, 'default')
+
+    @patch('core.admin.estimated_count', return_value=123456)
+    @patch.object(EstimatedCountPaginator, 'max_count', 3)
+    def test_recipe_search_count_capped(self, estimated_count):
+        """
+        Test a filtered list is counted exactly up to max_count rows
+        """
+        self.create_recipes(self.user, 5)
+
+        res = self.client.get(
+            reverse('admin:core_recipe_changelist'), {'q': 'Recipe'}
+        )
+
+        self.assertContains(res, '3 recipes')
+        estimated_count.assert_not_called()
+
+    def test_recipe_user_autocomplete(self):
+        """
+        Test the recipe user field searches users by email prefix
+        """
+        res = self.client.get(reverse('admin:core_recipe_add'))
+        self.assertContains(res, 'admin-autocomplete')
+
+        res = self.client.get(reverse('admin:autocomplete'), {
+            'app_label': 'core',
+            'model_name': 'recipe',
+            'field_name': 'user',
+            'term': 'user@',
+        })
+
+        self.assertEqual(
+            [result['id'] for result in res.json()['results']],
+            [str(self.user.id)]
+        )
+
+    def test_user_deletion_action(self):
+        """
+        Test users are deleted through the background deletion action
+        """
+        url = reverse('admin:core_user_changelist')
+        res = self.client.get(url)
+        self.assertNotContains(res, 'value="delete_selected"')
+
+        res = self.client.post(url, {
+            'action': 'schedule_deletion',
+            '_selected_action': [self.user.id],
+        })
+
+        self.assertEqual(res.status_code, 302)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        job = UserDeletion.objects.get(user=self.user)
+
+        res = self.client.get(reverse('admin:core_userdeletion_changelist'))
+
+        self.assertContains(res, job.email)
@@ -1,13 +1,26 @@
 """
 Test custom Django management commands.
 """
+import json
+import os
+import random
+import tempfile
+from io import StringIO
 from unittest.mock import patch
 
-from MySQLdb import OperationalError as MySqlError
-
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.management.commands.benchmark_api import (
+    Command as BenchmarkApiCommand
+)
+from core.management.commands.seed_data import recipe_counts
+from core.models import Recipe, RecipeStats
 
 
 @patch('core.management.commands.wait_for_db.Command.check')
@@ -31,10 +44,330 @@ class CommandTests(SimpleTestCase):
         """
         Test if we are waiting for database if the database is not ready.
         """
-        patched_check.side_effect = [MySqlError] * 2 + \
+        # The driver's own error, e.g. MySQLdb.OperationalError
+        driver_error = connections['default'].Database.OperationalError
+        patched_check.side_effect = [driver_error] * 2 + \
             [OperationalError] * 3 + [True]
 
         call_command('wait_for_db')
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+    @patch('time.sleep')
+    def test_wait_for_db_backoff(self, patched_sleep, patched_check):
+        """
+        Test the wait between attempts grows with jitter up to a limit.
+        """
+        patched_check.side_effect = [OperationalError] * 5 + [True]
+
+        call_command(
+            'wait_for_db', databases=['default'],
+            initial_delay=1, max_delay=4, stdout=StringIO()
+        )
+
+        waits = [call.args[0] for call in patched_sleep.call_args_list]
+        for wait, delay in zip(waits, [1, 2, 4, 4, 4]):
+            self.assertGreaterEqual(wait, delay / 2)
+            self.assertLessEqual(wait, delay)
+
+    def test_wait_for_db_timeout(self, patched_check):
+        """
+        Test the command gives up once the timeout has passed.
+        """
+        patched_check.side_effect = OperationalError('refused')
+
+        with self.assertRaisesMessage(CommandError, 'default (refused)'):
+            call_command(
+                'wait_for_db', databases=['default'],
+                timeout=0.05, initial_delay=0.01, stdout=StringIO()
+            )
+
+    @patch('time.sleep')
+    @patch(
+        'core.management.commands.wait_for_db.connection_errors',
+        return_value=(OperationalError,)
+    )
+    @patch('core.management.commands.wait_for_db.connections')
+    def test_wait_for_db_all_aliases(self, patched_connections,
+                                     patched_errors, patched_sleep,
+                                     patched_check):
+        """
+        Test every database is probed and only failures are retried.
+        """
+        patched_connections.__iter__.return_value = iter(
+            ['default', 'replica1']
+        )
+        failures = {'replica1': [OperationalError]}
+
+        def check(databases):
+            alias, = databases
+            if failures.get(alias):
+                raise failures[alias].pop()
+
+        patched_check.side_effect = check
+
+        call_command('wait_for_db', stdout=StringIO())
+
+        probed = [call.kwargs['databases'] for call in
+                  patched_check.call_args_list]
+        self.assertEqual(
+            sorted(probed),
+            [['default'], ['replica1'], ['replica1']]
+        )
+
+
+class BenchmarkCommandTests(TransactionTestCase):
+    """
+    Test the recipe query benchmark command.
+    """
+
+    def test_benchmark_recipe_queries(self):
+        """
+        Test the benchmark reports both phases and restores the index.
+        """
+        out = StringIO()
+
+        with CaptureQueriesContext(connection) as context:
+            call_command(
+                'benchmark_recipe_queries',
+                rows=40, users=2, repeat=2, stdout=out
+            )
+
+        output = out.getvalue()
+        self.assertIn('Before: without index', output)
+        self.assertIn('After: with index', output)
+        self.assertFalse(Recipe.objects.exists())
+        # Every timed run hits the database, 2 runs in each phase
+        timed = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT') and
+            'ORDER BY "core_recipe"."id" DESC' in query['sql']
+        ]
+        self.assertEqual(len(timed), 4)
+
+
+class BenchmarkApiCommandTests(TransactionTestCase):
+    """
+    Test the API benchmark command.
+    """
+
+    def test_benchmark_api_writes_results(self):
+        """
+        Test every scenario is reported and nothing is kept.
+        """
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.json')
+
+            call_command(
+                'benchmark_api',
+                users=2, recipes_per_user=3, requests=4, warmup=1,
+                output=path, stdout=out
+            )
+            with open(path) as results:
+                report = json.load(results)
+
+        self.assertEqual(
+            set(report['scenarios']),
+            {'list', 'detail', 'create', 'token', 'me'}
+        )
+        for result in report['scenarios'].values():
+            self.assertEqual(result['errors'], 0)
+            self.assertEqual(result['requests'], 4)
+            self.assertGreater(result['p99_ms'], 0)
+        self.assertFalse(get_user_model().objects.exists())
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_benchmark_api_compares_baseline(self):
+        """
+        Test changes against an earlier run are reported.
+        """
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            call_command(
+                'benchmark_api', users=1, recipes_per_user=1, requests=2,
+                warmup=0, scenario=['me'], output=path, stdout=StringIO()
+            )
+
+            call_command(
+                'benchmark_api', users=1, recipes_per_user=1, requests=2,
+                warmup=0, scenario=['me'], compare=path, stdout=out
+            )
+
+        self.assertIn('vs baseline', out.getvalue())
+
+    def test_benchmark_api_deletes_seed_on_failure(self):
+        """
+        Test committed seed data is deleted when a scenario fails.
+        """
+        get_user_model().objects.create_user(
+            email='bench-api-0@benchmark.invalid', password='testpass123'
+        )
+        kept = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123'
+        )
+
+        with patch.object(
+            BenchmarkApiCommand, 'run_scenario', side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                call_command(
+                    'benchmark_api', users=2, recipes_per_user=2,
+                    stdout=StringIO()
+                )
+
+        self.assertEqual(list(get_user_model().objects.all()), [kept])
+        self.assertFalse(Recipe.objects.exists())
+
+
+class SeedDataCommandTests(TestCase):
+    """
+    Test the seed data command.
+    """
+
+    def seed(self, **options):
+        call_command(
+            'seed_data', workers=1, batch_size=5, users_per_task=7,
+            stdout=StringIO(), **options
+        )
+
+    def test_seed_data_creates_rows(self):
+        """
+        Test users and recipes are created with contiguous ids.
+        """
+        self.seed(users=20, recipes_per_user=3, distribution='fixed')
+
+        users = get_user_model().objects.order_by('id')
+        self.assertEqual(users.count(), 20)
+        self.assertEqual(Recipe.objects.count(), 60)
+        ids = list(users.values_list('id', flat=True))
+        self.assertEqual(ids, list(range(ids[0], ids[0] + 20)))
+        self.assertEqual(
+            set(Recipe.objects.values_list('user_id', flat=True)), set(ids)
+        )
+        self.assertEqual(
+            users.values('password').distinct().count(), 1
+        )
+        self.assertEqual(
+            set(users.values_list('recipe_count', flat=True)), {3}
+        )
+        self.assertTrue(users.first().check_password('password123'))
+
+    def test_seed_data_deterministic(self):
+        """
+        Test the same seed generates the same rows.
+        """
+        def generate():
+            self.seed(users=15, recipes_per_user=4, seed=7)
+            rows = list(Recipe.objects.order_by('id').values_list(
+                'user__name', 'title', 'price', 'time_minutes'
+            ))
+            get_user_model().objects.all().delete()
+            return rows
+
+        self.assertEqual(generate(), generate())
+
+    def test_recipe_count_distributions(self):
+        """
+        Test recipe counts follow the mean and respect the maximum.
+        """
+        rng = random.Random(0)
+        for distribution in ('fixed', 'uniform', 'exponential', 'pareto'):
+            counts = recipe_counts(distribution, 20, 500, 5000, rng)
+            self.assertEqual(len(counts), 5000)
+            self.assertLessEqual(max(counts), 500)
+            self.assertAlmostEqual(sum(counts) / len(counts), 20, delta=4)
+
+
+class ReconcileRecipeCountsCommandTests(TestCase):
+    """
+    Test the recipe count reconcile command.
+    """
+
+    def setUp(self):
+        self.users = [
+            get_user_model().objects.create_user(
+                email=f'user{i}@example.com', password='testpass123'
+            )
+            for i in range(5)
+        ]
+        Recipe.objects.bulk_create([
+            Recipe(user=user, title='Recipe', time_minutes=5, price=5)
+            for i, user in enumerate(self.users)
+            for _ in range(i)
+        ])
+
+    def reconcile(self, **options):
+        out = StringIO()
+        call_command(
+            'reconcile_recipe_counts', chunk_size=2, stdout=out, **options
+        )
+        return out.getvalue()
+
+    def counts(self):
+        return list(get_user_model().objects.order_by('id').values_list(
+            'recipe_count', flat=True
+        ))
+
+    def test_repairs_drift(self):
+        """
+        Test drifted counts are recounted across chunks.
+        """
+        get_user_model().objects.filter(
+            pk__in=[self.users[1].pk, self.users[4].pk]
+        ).update(recipe_count=9)
+
+        out = self.reconcile()
+
+        self.assertEqual(self.counts(), [0, 1, 2, 3, 4])
+        self.assertIn('Checked 5 users. Repaired 2', out)
+
+    def test_dry_run(self):
+        """
+        Test a dry run reports drift without changing counts.
+        """
+        get_user_model().objects.filter(pk=self.users[0].pk).update(
+            recipe_count=3
+        )
+
+        out = self.reconcile(dry_run=True)
+
+        self.assertEqual(self.counts(), [3, 1, 2, 3, 4])
+        self.assertIn('Found 1', out)
+
+
+class RebuildRecipeStatsCommandTests(TestCase):
+    """
+    Test the recipe stats rebuild command.
+    """
+
+    def test_rebuild_creates_and_repairs_rows(self):
+        """
+        Test every user gets a stats row matching their recipes.
+        """
+        users = [
+            get_user_model().objects.create_user(
+                email=f'user{i}@example.com', password='testpass123'
+            )
+            for i in range(3)
+        ]
+        Recipe.objects.bulk_create([
+            Recipe(user=users[1], title='Recipe', time_minutes=20, price=4),
+            Recipe(user=users[1], title='Recipe', time_minutes=40, price=6),
+        ])
+        RecipeStats.objects.filter(user=users[1]).update(count=7)
+
+        out = StringIO()
+        call_command('rebuild_recipe_stats', chunk_size=2, stdout=out)
+
+        self.assertEqual(RecipeStats.objects.count(), 3)
+        stats = RecipeStats.objects.get(user=users[1])
+        self.assertEqual(stats.count, 2)
+        self.assertEqual(stats.price_average, 5)
+        self.assertEqual(stats.time_15_to_30, 1)
+        self.assertEqual(RecipeStats.objects.get(user=users[0]).count, 0)
+        self.assertIn(
+            'Rebuilt the recipe statistics of 3 users.', out.getvalue()
+        )
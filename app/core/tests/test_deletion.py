@@ -0,0 +1,198 @@
+"""
+Tests for chunked user deletion
+"""
+import datetime
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import deletion
+from core.models import Recipe, RecipeStats, UserDeletion
+from user.authentication import (
+    CachedTokenAuthentication,
+    local_token_cache,
+    shared_cache_key
+)
+
+
+@override_settings(USER_DELETION={'CHUNK_SIZE': 2})
+class UserDeletionTests(TestCase):
+    """
+    Test scheduling and running user deletions
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123'
+        )
+        self.other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123'
+        )
+        Recipe.objects.bulk_create([
+            Recipe(user=user, title='Recipe', time_minutes=5, price=1)
+            for user in [self.user] * 5 + [self.other]
+        ])
+
+    def test_schedule_deactivates_user(self):
+        """
+        Test scheduling deactivates the user and records the job once
+        """
+        job = deletion.schedule_user_deletion(self.user)
+
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertEqual(job.status, UserDeletion.PENDING)
+        self.assertEqual(job.recipes_total, 5)
+        self.assertEqual(job.email, 'user@example.com')
+        self.assertEqual(deletion.schedule_user_deletion(self.user), job)
+
+    def test_run_deletes_in_chunks(self):
+        """
+        Test recipes are deleted a chunk at a time before the user
+        """
+        job = deletion.schedule_user_deletion(self.user)
+
+        with patch.object(
+            deletion, 'delete_chunk', wraps=deletion.delete_chunk
+        ) as delete_chunk:
+            self.assertTrue(deletion.run_user_deletion(job))
+
+        # 3 chunks of at most 2 recipes and one finding none left
+        self.assertEqual(delete_chunk.call_count, 4)
+        self.assertEqual(job.status, UserDeletion.DONE)
+        self.assertEqual(job.recipes_deleted, 5)
+        self.assertEqual(job.progress, 1.0)
+        self.assertIsNone(job.user)
+        self.assertIsNotNone(job.finished_at)
+        self.assertFalse(
+            get_user_model().objects.filter(pk=self.user.pk).exists()
+        )
+        self.assertFalse(RecipeStats.objects.filter(pk=self.user.pk).exists())
+        self.assertEqual(Recipe.objects.filter(user=self.other).count(), 1)
+
+    def test_failed_run_resumes(self):
+        """
+        Test a failed job keeps its progress and finishes on the next run
+        """
+        job = deletion.schedule_user_deletion(self.user)
+        delete_chunk = deletion.delete_chunk
+        calls = []
+
+        def fail_second_chunk(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError('connection lost')
+            return delete_chunk(*args)
+
+        with patch.object(deletion, 'delete_chunk', fail_second_chunk), \
+                patch.object(deletion.logger, 'exception'):
+            with self.assertRaises(RuntimeError):
+                deletion.run_user_deletion(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, UserDeletion.FAILED)
+        self.assertEqual(job.recipes_deleted, 2)
+        self.assertIn('connection lost', job.error)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 3)
+
+        self.assertTrue(deletion.run_user_deletion(job))
+        self.assertEqual(job.status, UserDeletion.DONE)
+        self.assertEqual(job.recipes_deleted, 5)
+
+    def test_leased_job_skipped(self):
+        """
+        Test a job leased by another worker is not run
+        """
+        job = deletion.schedule_user_deletion(self.user)
+        UserDeletion.objects.filter(pk=job.pk).update(
+            status=UserDeletion.RUNNING,
+            lease_expires=timezone.now() + datetime.timedelta(minutes=1)
+        )
+
+        self.assertFalse(deletion.run_user_deletion(job))
+        self.assertNotIn(job, deletion.pending_user_deletions())
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 5)
+
+    def test_expired_lease_resumed(self):
+        """
+        Test a job whose worker died is picked up again
+        """
+        job = deletion.schedule_user_deletion(self.user)
+        UserDeletion.objects.filter(pk=job.pk).update(
+            status=UserDeletion.RUNNING,
+            lease_expires=timezone.now() - datetime.timedelta(seconds=1)
+        )
+
+        self.assertIn(job, deletion.pending_user_deletions())
+        self.assertTrue(deletion.run_user_deletion(job))
+
+    def test_process_user_deletions_command(self):
+        """
+        Test the command runs every pending job
+        """
+        deletion.schedule_user_deletion(self.user)
+        deletion.schedule_user_deletion(self.other)
+        out = StringIO()
+
+        call_command('process_user_deletions', stdout=out)
+
+        self.assertFalse(get_user_model().objects.exists())
+        self.assertEqual(
+            UserDeletion.objects.filter(status=UserDeletion.DONE).count(), 2
+        )
+        self.assertIn(
+            'Deleted user@example.com and 5 recipes.', out.getvalue()
+        )
+
+
+class ScheduledUserCacheTests(TransactionTestCase):
+    """
+    Test scheduling a deletion is seen by the token cache once committed
+    """
+
+    def setUp(self):
+        cache.clear()
+        local_token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_cached_token_evicted_after_commit(self):
+        """
+        Test an entry cached while the job was being created is evicted
+        """
+        self.client.get(reverse('user:me'))
+        stale = CachedTokenAuthentication().dump(self.user, self.token)
+        get_or_create = UserDeletion.objects.get_or_create
+
+        def cache_committed_row(*args, **kwargs):
+            # Another process authenticating before the commit
+            cache.set(shared_cache_key(self.token.key), stale)
+            return get_or_create(*args, **kwargs)
+
+        with patch.object(
+            UserDeletion.objects, 'get_or_create',
+            side_effect=cache_committed_row
+        ):
+            deletion.schedule_user_deletion(self.user)
+
+        self.assertIsNone(local_token_cache.get(self.token.key))
+        self.assertIsNone(cache.get(shared_cache_key(self.token.key)))
+        res = self.client.get(reverse('user:me'))
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
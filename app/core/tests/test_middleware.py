@@ -0,0 +1,273 @@
+"""
+Tests for the API middleware
+"""
+import json
+import os
+import pstats
+import re
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.middleware import ServerTimingMiddleware
+from core.models import Recipe
+
+
+RECIPES_URL = reverse('recipes:recipe-list')
+ME_URL = reverse('user:me')
+
+
+def parse_server_timing(header):
+    """
+    Return the metric durations and descriptions of a header
+    """
+    metrics = {}
+    for metric in header.split(', '):
+        name, *params = metric.split(';')
+        metrics[name] = dict(param.split('=', 1) for param in params)
+    return metrics
+
+
+class ServerTimingDisabledTests(TestCase):
+    """
+    Test the middleware stays out of the way by default
+    """
+
+    @override_settings(SERVER_TIMING={'ENABLED': False})
+    def test_not_used_when_disabled(self):
+        """
+        Test the middleware removes itself when disabled
+        """
+        with self.assertRaises(MiddlewareNotUsed):
+            ServerTimingMiddleware(lambda request: None)
+
+    @override_settings(SERVER_TIMING={'ENABLED': False})
+    def test_no_header_when_disabled(self):
+        """
+        Test responses carry no timing header when disabled
+        """
+        res = self.client.get(reverse('healthz'))
+
+        self.assertFalse(res.has_header('Server-Timing'))
+
+
+@override_settings(SERVER_TIMING={'ENABLED': True})
+class ServerTimingTests(TestCase):
+    """
+    Test timings are reported for requests to both apps
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123'
+        )
+        Recipe.objects.create(
+            user=self.user, title='Recipe', time_minutes=5, price='5.00'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_recipe_list_header(self):
+        """
+        Test a recipe list reports its queries and every phase
+        """
+        res = self.client.get(RECIPES_URL)
+
+        metrics = parse_server_timing(res['Server-Timing'])
+        self.assertEqual(
+            set(metrics), {'db', 'view', 'render', 'total'}
+        )
+        self.assertRegex(metrics['db']['desc'], r'"[1-9]\d* queries"')
+        self.assertGreater(float(metrics['render']['dur']), 0)
+        self.assertGreaterEqual(
+            float(metrics['total']['dur']),
+            float(metrics['view']['dur'])
+        )
+
+    def test_user_request_logged(self):
+        """
+        Test a user request is logged as JSON
+        """
+        with self.assertLogs('core.timing', level='INFO') as logs:
+            res = self.client.get(ME_URL)
+
+        data = json.loads(logs.records[0].getMessage())
+        self.assertEqual(data['view'], 'user:me')
+        self.assertEqual(data['status'], res.status_code)
+        self.assertEqual(logs.records[0].timing, data)
+        self.assertTrue(re.search(r'total;dur=[\d.]+', res['Server-Timing']))
+
+    @override_settings(SERVER_TIMING={
+        'ENABLED': True, 'LOG_THRESHOLD_MS': 60000
+    })
+    def test_fast_request_not_logged(self):
+        """
+        Test requests below the threshold only get the header
+        """
+        with patch('core.middleware.logger') as patched_logger:
+            res = self.client.get(ME_URL)
+
+        patched_logger.info.assert_not_called()
+        self.assertTrue(res.has_header('Server-Timing'))
+
+
+class ProfilingMiddlewareTests(TestCase):
+    """
+    Test on-demand request profiling
+    """
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+        settings = override_settings(REQUEST_PROFILING={
+            'ENABLED': True,
+            'DIRECTORY': self.directory,
+            'RATE_LIMIT': 2,
+        })
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.staff = get_user_model().objects.create_user(
+            email='staff@example.com',
+            password='testpass123',
+            is_staff=True
+        )
+        token = Token.objects.create(user=self.staff)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def profiles(self):
+        return sorted(os.listdir(self.directory))
+
+    def user_client(self):
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123'
+        )
+        token = Token.objects.create(user=user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
+
+    def test_staff_request_profiled(self):
+        """
+        Test a flagged staff request writes a loadable profile
+        """
+        res = self.client.get(RECIPES_URL, HTTP_X_PROFILE='1')
+
+        self.assertEqual(self.profiles(), [res['X-Profile-Id']])
+        stats = pstats.Stats(os.path.join(self.directory, res['X-Profile-Id']))
+        self.assertGreater(stats.total_calls, 0)
+
+    def test_query_flag_profiles(self):
+        """
+        Test the query flag triggers profiling too
+        """
+        res = self.client.get(RECIPES_URL, {'profile': '1'})
+
+        self.assertTrue(res.has_header('X-Profile-Id'))
+
+    def test_unflagged_request_not_profiled(self):
+        """
+        Test requests without the flag are left alone
+        """
+        res = self.client.get(RECIPES_URL)
+
+        self.assertFalse(res.has_header('X-Profile-Id'))
+        self.assertEqual(self.profiles(), [])
+
+    def test_non_staff_request_not_profiled(self):
+        """
+        Test a flagged request by a regular user skips the profiler
+        """
+        with patch('core.middleware.cProfile.Profile') as profile:
+            res = self.user_client().get(RECIPES_URL, HTTP_X_PROFILE='1')
+
+        profile.assert_not_called()
+        self.assertFalse(res.has_header('X-Profile-Id'))
+        self.assertEqual(self.profiles(), [])
+
+    def test_anonymous_request_not_profiled(self):
+        """
+        Test a flagged request without credentials skips the profiler
+        """
+        with patch('core.middleware.cProfile.Profile') as profile:
+            res = APIClient().get(RECIPES_URL, {'profile': '1'})
+
+        profile.assert_not_called()
+        self.assertFalse(res.has_header('X-Profile-Id'))
+
+    def test_other_requests_leave_rate_limit(self):
+        """
+        Test invalid tokens and regular users use up no profiling slots
+        """
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token garbage')
+        for _ in range(2):
+            res = client.get(RECIPES_URL, HTTP_X_PROFILE='1')
+            self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.user_client().get(RECIPES_URL, HTTP_X_PROFILE='1')
+
+        res = self.client.get(RECIPES_URL, HTTP_X_PROFILE='1')
+
+        self.assertTrue(res.has_header('X-Profile-Id'))
+
+    def test_staff_session_profiled(self):
+        """
+        Test a staff user logged in to the admin can profile its pages
+        """
+        client = APIClient()
+        client.force_login(self.staff)
+
+        res = client.get(reverse('admin:index'), HTTP_X_PROFILE='1')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.has_header('X-Profile-Id'))
+
+    def test_rate_key_expiring_counts_again(self):
+        """
+        Test the counter expiring between add() and incr() starts over
+        """
+        with patch.object(cache, 'incr', side_effect=ValueError):
+            res = self.client.get(RECIPES_URL, HTTP_X_PROFILE='1')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.has_header('X-Profile-Id'))
+
+    def test_rate_limited(self):
+        """
+        Test no more profiles than the rate limit are written
+        """
+        for _ in range(3):
+            self.client.get(RECIPES_URL, HTTP_X_PROFILE='1')
+
+        self.assertEqual(len(self.profiles()), 2)
+
+    def test_directory_size_capped(self):
+        """
+        Test nothing is written once the directory is full
+        """
+        with override_settings(REQUEST_PROFILING={
+            'ENABLED': True,
+            'DIRECTORY': self.directory,
+            'MAX_DIRECTORY_BYTES': 1,
+        }):
+            self.client.get(RECIPES_URL, HTTP_X_PROFILE='1')
+            res = self.client.get(RECIPES_URL, HTTP_X_PROFILE='1')
+
+        self.assertFalse(res.has_header('X-Profile-Id'))
+        self.assertEqual(len(self.profiles()), 1)
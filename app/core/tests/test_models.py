@@ -3,6 +3,7 @@ Test models used by Django
 """
 from django.test import TestCase
 from django.contrib.auth import get_user_model  # function retrieves user model
+from django.db.models import F
 
 from decimal import Decimal
 
@@ -90,3 +91,255 @@ class ModelTests(TestCase):
         )
 
         self.assertEqual(str(recipe), recipe.title)
+
+
+class RecipeCountTests(TestCase):
+    """
+    Test User.recipe_count follows recipe creates and deletes
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123'
+        )
+
+    def create_recipe(self, **params):
+        defaults = {
+            'user': self.user,
+            'title': 'Sample recipe name',
+            'time_minutes': 5,
+            'price': Decimal('5.50'),
+        }
+        defaults.update(params)
+        return models.Recipe.objects.create(**defaults)
+
+    def count(self, user=None):
+        user = user or self.user
+        user.refresh_from_db(fields=['recipe_count'])
+        return user.recipe_count
+
+    def test_create_and_delete(self):
+        """
+        Test saving a new recipe increments and deleting decrements
+        """
+        recipe = self.create_recipe()
+        self.create_recipe()
+        self.assertEqual(self.count(), 2)
+
+        recipe.title = 'Changed'
+        recipe.save()
+        self.assertEqual(self.count(), 2)
+
+        recipe.delete()
+        self.assertEqual(self.count(), 1)
+
+    def test_bulk_create_and_queryset_delete(self):
+        """
+        Test bulk inserts and queryset deletes adjust every user
+        """
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123'
+        )
+        models.Recipe.objects.bulk_create([
+            models.Recipe(user=user, title='Bulk', time_minutes=1, price=1)
+            for user in (self.user, self.user, self.user, other)
+        ])
+        self.assertEqual(self.count(), 3)
+        self.assertEqual(self.count(other), 1)
+
+        ids = models.Recipe.objects.filter(
+            user=self.user
+        ).values_list('pk', flat=True)
+        models.Recipe.objects.filter(pk__in=list(ids)[:2]).delete()
+        models.Recipe.objects.filter(user=other).delete()
+        self.assertEqual(self.count(), 1)
+        self.assertEqual(self.count(other), 0)
+
+    def test_user_save_keeps_count(self):
+        """
+        Test saving a user loaded earlier does not reset its count
+        """
+        stale = get_user_model().objects.get(pk=self.user.pk)
+        self.create_recipe()
+
+        stale.name = 'New name'
+        stale.save()
+
+        self.assertEqual(self.count(), 1)
+
+    def test_count_never_negative(self):
+        """
+        Test a drifted count stops at zero instead of going negative
+        """
+        recipe = self.create_recipe()
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            recipe_count=0
+        )
+
+        recipe.delete()
+
+        self.assertEqual(self.count(), 0)
+
+
+class RecipeStatsTests(TestCase):
+    """
+    Test RecipeStats is maintained incrementally on recipe writes
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123'
+        )
+
+    def create_recipe(self, price, minutes, user=None):
+        return models.Recipe.objects.create(
+            user=user or self.user,
+            title='Sample recipe name',
+            time_minutes=minutes,
+            price=Decimal(price)
+        )
+
+    def stats(self, user=None):
+        return models.RecipeStats.objects.get(user=user or self.user)
+
+    def assertMatchesRebuild(self, user=None):
+        """
+        Assert the maintained row equals one rebuilt from the recipes
+        """
+        user = user or self.user
+        fields = [f.name for f in models.RecipeStats._meta.concrete_fields]
+        maintained = models.RecipeStats.objects.filter(
+            user=user
+        ).values(*fields).get()
+        models.rebuild_recipe_stats([user.pk])
+        rebuilt = models.RecipeStats.objects.filter(
+            user=user
+        ).values(*fields).get()
+        self.assertEqual(maintained, rebuilt)
+
+    def test_create(self):
+        """
+        Test creating recipes updates totals, extremes and histogram
+        """
+        self.create_recipe('5.00', 10)
+        self.create_recipe('2.50', 45)
+        self.create_recipe('9.00', 200)
+
+        stats = self.stats()
+        self.assertEqual(stats.count, 3)
+        self.assertEqual(stats.price_total, Decimal('16.50'))
+        self.assertEqual(stats.price_min, Decimal('2.50'))
+        self.assertEqual(stats.price_max, Decimal('9.00'))
+        self.assertEqual(stats.price_average, Decimal('5.50'))
+        self.assertEqual(
+            [bucket['count'] for bucket in stats.time_histogram()],
+            [1, 0, 1, 0, 1]
+        )
+        self.assertMatchesRebuild()
+
+    def test_delete_extreme_recomputed(self):
+        """
+        Test deleting the cheapest recipe recomputes the minimum
+        """
+        cheapest = self.create_recipe('1.00', 10)
+        self.create_recipe('4.00', 20)
+        self.create_recipe('8.00', 30)
+
+        cheapest.delete()
+
+        stats = self.stats()
+        self.assertEqual(stats.price_min, Decimal('4.00'))
+        self.assertEqual(stats.count, 2)
+        self.assertMatchesRebuild()
+
+    def test_delete_last_recipe(self):
+        """
+        Test deleting every recipe empties the stats
+        """
+        recipe = self.create_recipe('3.00', 10)
+
+        recipe.delete()
+
+        stats = self.stats()
+        self.assertEqual(stats.count, 0)
+        self.assertIsNone(stats.price_min)
+        self.assertIsNone(stats.price_average)
+        self.assertMatchesRebuild()
+
+    def test_update(self):
+        """
+        Test changing price and time moves the recipe in the stats
+        """
+        recipe = self.create_recipe('9.00', 10)
+        self.create_recipe('5.00', 10)
+
+        recipe.price = Decimal('1.00')
+        recipe.time_minutes = 90
+        recipe.save()
+
+        stats = self.stats()
+        self.assertEqual(stats.price_max, Decimal('5.00'))
+        self.assertEqual(stats.price_min, Decimal('1.00'))
+        self.assertEqual(stats.time_under_15, 1)
+        self.assertEqual(stats.time_60_to_120, 1)
+        self.assertMatchesRebuild()
+
+    def test_bulk_paths(self):
+        """
+        Test bulk create, update, queryset update and delete
+        """
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123'
+        )
+        recipes = models.Recipe.objects.bulk_create([
+            models.Recipe(
+                user=user, title='Bulk', time_minutes=minutes, price=price
+            )
+            for user, price, minutes in (
+                (self.user, Decimal('1.00'), 5),
+                (self.user, Decimal('2.00'), 25),
+                (self.user, Decimal('3.00'), 50),
+                (other, Decimal('4.00'), 130),
+            )
+        ])
+        self.assertMatchesRebuild()
+        self.assertMatchesRebuild(other)
+
+        recipes = list(models.Recipe.objects.filter(user=self.user))
+        for recipe in recipes:
+            recipe.price = recipe.price * 2
+        models.Recipe.objects.bulk_update(recipes, ['price'])
+        self.assertEqual(self.stats().price_max, Decimal('6.00'))
+        self.assertMatchesRebuild()
+
+        models.Recipe.objects.filter(user=self.user).update(
+            time_minutes=F('time_minutes') + 100
+        )
+        self.assertEqual(self.stats().time_120_plus, 2)
+        self.assertMatchesRebuild()
+
+        models.Recipe.objects.filter(user=other).update(user=self.user)
+        self.assertEqual(self.stats().count, 4)
+        self.assertEqual(self.stats(other).count, 0)
+        self.assertMatchesRebuild()
+        self.assertMatchesRebuild(other)
+
+        models.Recipe.objects.filter(price__gte=4).delete()
+        self.assertEqual(self.stats().price_max, Decimal('2.00'))
+        self.assertMatchesRebuild()
+
+    def test_missing_row_rebuilt(self):
+        """
+        Test a write for a user without a stats row builds it
+        """
+        self.create_recipe('2.00', 10)
+        models.RecipeStats.objects.all().delete()
+
+        self.create_recipe('3.00', 10)
+
+        self.assertEqual(self.stats().count, 2)
+        self.assertMatchesRebuild()
@@ -0,0 +1,263 @@
+"""
+Tests for database connection pooling and health checks
+"""
+import os
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+from django.db import connections
+from django.db.backends.sqlite3 import base as sqlite3
+from django.test import SimpleTestCase
+
+from core.db.backends.mixins import HealthCheckMixin, PooledConnectionMixin
+from core.db.pool import ConnectionPool, PoolTimeout, close_pools
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeFactory:
+    def __init__(self):
+        self.connections = []
+
+    def __call__(self):
+        connection = FakeConnection()
+        self.connections.append(connection)
+        return connection
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """
+    Test the connection pool with fake connections
+    """
+
+    def setUp(self):
+        self.factory = FakeFactory()
+
+    def test_released_connection_reused(self):
+        """
+        Test a released connection is handed out again
+        """
+        pool = ConnectionPool(self.factory, max_size=2)
+
+        first = pool.acquire()
+        pool.release(first)
+        second = pool.acquire()
+
+        self.assertIs(first, second)
+        self.assertEqual(len(self.factory.connections), 1)
+        self.assertEqual(pool.snapshot()['checkouts'], 2)
+
+    def test_checkout_times_out_when_exhausted(self):
+        """
+        Test no more than max_size connections are opened
+        """
+        pool = ConnectionPool(self.factory, max_size=1, timeout=0.05)
+        pool.acquire()
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+
+        snapshot = pool.snapshot()
+        self.assertEqual(len(self.factory.connections), 1)
+        self.assertEqual(snapshot['timeouts'], 1)
+        self.assertGreater(snapshot['wait_time_max'], 0)
+
+    def test_waiting_checkout_gets_released_connection(self):
+        """
+        Test a waiting checkout is woken by a release and its wait recorded
+        """
+        pool = ConnectionPool(self.factory, max_size=1, timeout=5)
+        connection = pool.acquire()
+        timer = threading.Timer(0.05, pool.release, [connection])
+        timer.start()
+
+        acquired = pool.acquire()
+        timer.join()
+
+        snapshot = pool.snapshot()
+        self.assertIs(acquired, connection)
+        self.assertEqual(snapshot['waits'], 1)
+        self.assertGreaterEqual(snapshot['wait_time_max'], 0.04)
+
+    def test_idle_connection_closed_after_timeout(self):
+        """
+        Test connections idle for too long are closed instead of reused
+        """
+        pool = ConnectionPool(self.factory, max_size=1, idle_timeout=0.01)
+        first = pool.acquire()
+        pool.release(first)
+        time.sleep(0.02)
+
+        second = pool.acquire()
+
+        self.assertIsNot(first, second)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.snapshot()['size'], 1)
+
+    def test_invalid_connection_replaced(self):
+        """
+        Test a connection failing validation is discarded
+        """
+        def validate(connection):
+            raise OSError('gone away')
+
+        pool = ConnectionPool(self.factory, max_size=1, validate=validate)
+        first = pool.acquire()
+        pool.release(first)
+
+        second = pool.acquire()
+
+        self.assertIsNot(first, second)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.snapshot()['discarded'], 1)
+
+    def test_failed_connect_frees_slot(self):
+        """
+        Test a factory error does not use up the pool
+        """
+        factory = FakeFactory()
+        pool = ConnectionPool(
+            factory=lambda: (_ for _ in ()).throw(OSError('refused')),
+            max_size=1,
+            timeout=0.05
+        )
+
+        with self.assertRaises(OSError):
+            pool.acquire()
+
+        pool.factory = factory
+        self.assertIsNotNone(pool.acquire())
+
+    def test_clear_closes_idle(self):
+        """
+        Test clearing the pool closes idle connections
+        """
+        pool = ConnectionPool(self.factory, max_size=2)
+        connection = pool.acquire()
+        pool.release(connection)
+
+        pool.clear()
+
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.snapshot()['size'], 0)
+
+
+class DatabaseWrapper(HealthCheckMixin,
+                      PooledConnectionMixin,
+                      sqlite3.DatabaseWrapper):
+    pass
+
+
+class BackendMixinTests(SimpleTestCase):
+    """
+    Test the backend mixins on SQLite
+    """
+
+    def setUp(self):
+        handle, self.name = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        self.addCleanup(os.remove, self.name)
+        self.addCleanup(close_pools)
+
+    def make_wrapper(self, **options):
+        settings_dict = {
+            **connections['default'].settings_dict,
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': self.name,
+            'OPTIONS': {},
+            'CONN_MAX_AGE': None,
+            'CONN_HEALTH_CHECKS': False,
+            'POOL': None,
+            **options,
+        }
+        wrapper = DatabaseWrapper(settings_dict, alias='pool-test')
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_pooled_connection_reused(self):
+        """
+        Test closing returns the connection to the pool for reuse
+        """
+        wrapper = self.make_wrapper(CONN_MAX_AGE=0, POOL={'MAX_SIZE': 2})
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+
+        wrapper.close()
+        wrapper.ensure_connection()
+
+        self.assertIs(wrapper.connection, raw)
+
+    def test_pooled_connection_validated(self):
+        """
+        Test connections taken from the pool are reused only if usable
+        """
+        wrapper = self.make_wrapper(
+            CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=True, POOL={'MAX_SIZE': 2}
+        )
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+        wrapper.close()
+        wrapper.ensure_connection()
+        self.assertIs(wrapper.connection, raw)
+        wrapper.close()
+        # Closing the raw connection makes the check query fail
+        raw.close()
+
+        wrapper.ensure_connection()
+
+        self.assertIsNot(wrapper.connection, raw)
+        wrapper.cursor().execute('SELECT 1')
+
+    def test_connection_in_transaction_discarded(self):
+        """
+        Test a connection closed outside autocommit is not reused
+        """
+        wrapper = self.make_wrapper(CONN_MAX_AGE=0, POOL={'MAX_SIZE': 2})
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+        wrapper.set_autocommit(False)
+
+        wrapper.close()
+        wrapper.ensure_connection()
+
+        self.assertIsNot(wrapper.connection, raw)
+
+    def test_health_check_replaces_dead_connection(self):
+        """
+        Test an unusable persistent connection is replaced
+        """
+        wrapper = self.make_wrapper(CONN_HEALTH_CHECKS=True)
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+        wrapper.close_if_unusable_or_obsolete()
+
+        with patch.object(wrapper, 'is_usable', return_value=False) as check:
+            wrapper.cursor().execute('SELECT 1')
+            wrapper.cursor().execute('SELECT 1')
+
+        self.assertIsNot(wrapper.connection, raw)
+        check.assert_called_once()
+
+    def test_health_check_once_per_request(self):
+        """
+        Test a usable connection is checked once and kept
+        """
+        wrapper = self.make_wrapper(CONN_HEALTH_CHECKS=True)
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+        wrapper.close_if_unusable_or_obsolete()
+
+        with patch.object(wrapper, 'is_usable', return_value=True) as check:
+            wrapper.cursor().execute('SELECT 1')
+            wrapper.cursor().execute('SELECT 1')
+
+        self.assertIs(wrapper.connection, raw)
+        check.assert_called_once()
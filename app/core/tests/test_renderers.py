@@ -0,0 +1,139 @@
+"""
+Test the API renderers and parsers
+"""
+import datetime
+import io
+import uuid
+from decimal import Decimal
+
+import msgpack
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.parsers import MessagePackParser, ORJSONParser
+from core.renderers import MessagePackRenderer, ORJSONRenderer
+
+
+class RendererTests(SimpleTestCase):
+    """
+    Test rendering and parsing without the API
+    """
+
+    def test_orjson_native_types(self):
+        """
+        Test Decimal, datetime and UUID are rendered
+        """
+        data = {
+            'price': Decimal('5.50'),
+            'at': datetime.datetime(
+                2023, 7, 5, 9, 15, tzinfo=datetime.timezone.utc
+            ),
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        }
+
+        rendered = ORJSONRenderer().render(data)
+
+        self.assertEqual(
+            rendered,
+            b'{"price":5.5,"at":"2023-07-05T09:15:00Z",'
+            b'"id":"12345678-1234-5678-1234-567812345678"}'
+        )
+
+    def test_orjson_matches_json_renderer(self):
+        """
+        Test serializer style data renders like DRF's JSON renderer
+        """
+        data = [
+            {'id': 1, 'title': 'Café “crème”', 'price': '5.25', 'link': ''},
+            {'id': 2, 'errors': {'time_minutes': ['A valid integer.']}},
+        ]
+
+        self.assertEqual(
+            ORJSONRenderer().render(data),
+            JSONRenderer().render(data)
+        )
+
+    def test_orjson_escapes_line_separators(self):
+        """
+        Test U+2028 and U+2029 are escaped like DRF's JSON renderer
+        """
+        data = {'title': 'Line\u2028Paragraph\u2029End'}
+
+        rendered = ORJSONRenderer().render(data)
+
+        self.assertEqual(
+            rendered, b'{"title":"Line\\u2028Paragraph\\u2029End"}'
+        )
+        self.assertEqual(rendered, JSONRenderer().render(data))
+
+    def test_orjson_parse_error(self):
+        """
+        Test malformed JSON raises a parse error
+        """
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"title": '))
+
+    def test_msgpack_round_trip(self):
+        """
+        Test MessagePack output parses back to the same data
+        """
+        data = {'title': 'Sample', 'price': Decimal('5.25'), 'tags': [1, 2]}
+
+        rendered = MessagePackRenderer().render(data)
+        parsed = MessagePackParser().parse(io.BytesIO(rendered))
+
+        self.assertEqual(
+            parsed,
+            {'title': 'Sample', 'price': 5.25, 'tags': [1, 2]}
+        )
+
+
+class NegotiationTests(TestCase):
+    """
+    Test clients can negotiate the API formats
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='name@domain.com',
+            password='testpass123',
+            name='Test Name'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_msgpack_response(self):
+        """
+        Test Accept: application/msgpack returns MessagePack
+        """
+        res = self.client.get(
+            reverse('user:me'),
+            HTTP_ACCEPT='application/msgpack'
+        )
+
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        self.assertEqual(
+            msgpack.unpackb(res.content),
+            {'email': 'name@domain.com', 'name': 'Test Name',
+             'recipe_count': 0}
+        )
+
+    def test_msgpack_request(self):
+        """
+        Test a MessagePack request body is parsed
+        """
+        res = self.client.patch(
+            reverse('user:me'),
+            msgpack.packb({'name': 'Packed Name'}),
+            content_type='application/msgpack'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['name'], 'Packed Name')
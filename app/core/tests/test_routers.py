@@ -0,0 +1,255 @@
+"""
+Tests for the read replica router
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from core.routers import ReplicaRouter, is_pinned, pin_user, replica_reads
+
+
+RECIPES_URL = reverse('recipes:recipe-list')
+ME_URL = reverse('user:me')
+STATS_URL = reverse('recipes:recipe-stats')
+
+
+@override_settings(DATABASE_ROUTING={'REPLICAS': ['replica1', 'replica2']})
+class ReplicaRouterTests(SimpleTestCase):
+    """
+    Test routing decisions
+    """
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_use_primary_by_default(self):
+        """
+        Test reads outside replica_reads() have no replica
+        """
+        self.assertIsNone(self.router.db_for_read(Recipe))
+
+    def test_reads_use_replica_when_enabled(self):
+        """
+        Test reads inside replica_reads() go to a replica
+        """
+        with replica_reads():
+            alias = self.router.db_for_read(Recipe)
+
+        self.assertIn(alias, ['replica1', 'replica2'])
+        self.assertIsNone(self.router.db_for_read(Recipe))
+
+    def test_writes_use_primary(self):
+        """
+        Test writes go to the primary even inside replica_reads()
+        """
+        with replica_reads():
+            alias = self.router.db_for_write(Recipe)
+
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+
+    def test_unrelated_database_writes_not_routed(self):
+        """
+        Test objects of a database outside the replica set stay there
+        """
+        recipe = Recipe()
+        recipe._state.db = 'other'
+
+        self.assertIsNone(self.router.db_for_write(Recipe, instance=recipe))
+        recipe._state.db = 'replica1'
+        self.assertEqual(
+            self.router.db_for_write(Recipe, instance=recipe),
+            DEFAULT_DB_ALIAS
+        )
+
+    @override_settings(DATABASE_ROUTING={'REPLICAS': []})
+    def test_no_replicas_configured(self):
+        """
+        Test replica_reads() is a no-op without replicas
+        """
+        with replica_reads():
+            self.assertIsNone(self.router.db_for_read(Recipe))
+
+    def test_replicas_not_migrated(self):
+        """
+        Test migrations only run on the primary
+        """
+        self.assertFalse(self.router.allow_migrate('replica1', 'core'))
+        self.assertIsNone(self.router.allow_migrate(DEFAULT_DB_ALIAS, 'core'))
+
+
+REPLICA = 'replica_test'
+
+
+@override_settings(DATABASE_ROUTING={'REPLICAS': [REPLICA]})
+class ReplicaReadViewTests(TestCase):
+    """
+    Test which API requests read from a replica
+
+    The replica holds different rows than the primary, so each response
+    shows which database answered it.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        # Only this class knows the replica, so the health checks of
+        # other tests don't probe it
+        connections.settings[REPLICA] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        }
+        call_command('migrate', database=REPLICA, verbosity=0)
+        cls.databases = {DEFAULT_DB_ALIAS, REPLICA}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+            name='Primary Name'
+        )
+        get_user_model().objects.db_manager(REPLICA).create_user(
+            id=self.user.id,
+            email='user@example.com',
+            password='testpass123',
+            name='Replica Name'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_recipe(self, title, using=DEFAULT_DB_ALIAS, **params):
+        defaults = {
+            'time_minutes': 5,
+            'price': Decimal('5.50'),
+        }
+        defaults.update(params)
+        return Recipe.objects.using(using).create(
+            user_id=self.user.id, title=title, **defaults
+        )
+
+    def titles(self, res):
+        return [recipe['title'] for recipe in res.data['results']]
+
+    def test_recipe_list_reads_replica(self):
+        """
+        Test listing recipes reads from a replica
+        """
+        self.create_recipe('Primary recipe')
+        self.create_recipe('Replica recipe', using=REPLICA)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.titles(res), ['Replica recipe'])
+
+    def test_recipe_detail_reads_replica(self):
+        """
+        Test retrieving a recipe reads from a replica
+        """
+        recipe = self.create_recipe('Replica recipe', using=REPLICA)
+
+        res = self.client.get(
+            reverse('recipes:recipe-detail', args=[recipe.id])
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], 'Replica recipe')
+
+    def test_stats_read_replica(self):
+        """
+        Test the recipe statistics read from a replica
+        """
+        self.create_recipe('Primary recipe', price=Decimal('1.00'))
+        self.create_recipe(
+            'Replica recipe', using=REPLICA, price=Decimal('9.00')
+        )
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['price']['max'], '9.00')
+
+    def test_me_reads_replica(self):
+        """
+        Test loading the user for a signed token reads from a replica
+        """
+        res = self.client.post(reverse('user:token-signed'), {
+            'email': 'user@example.com',
+            'password': 'testpass123',
+        })
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {res.data["access"]}')
+
+        res = client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['name'], 'Replica Name')
+
+    def test_write_uses_primary(self):
+        """
+        Test creating a recipe writes to the primary only
+        """
+        res = self.client.post(RECIPES_URL, {
+            'title': 'New recipe',
+            'time_minutes': 10,
+            'price': '2.00',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Recipe.objects.filter(title='New recipe').exists())
+        self.assertFalse(
+            Recipe.objects.using(REPLICA).filter(title='New recipe').exists()
+        )
+
+    def test_write_pins_user_to_primary(self):
+        """
+        Test reads after a write use the primary
+        """
+        self.create_recipe('Replica recipe', using=REPLICA)
+        res = self.client.post(RECIPES_URL, {
+            'title': 'New recipe',
+            'time_minutes': 10,
+            'price': '2.00',
+        })
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(is_pinned(self.user.pk))
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(self.titles(res), ['New recipe'])
+
+    def test_failed_write_does_not_pin(self):
+        """
+        Test an invalid write leaves the user on replicas
+        """
+        res = self.client.post(RECIPES_URL, {'title': ''})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(is_pinned(self.user.pk))
+
+    def test_pin_expires(self):
+        """
+        Test a pin only lasts for the configured window
+        """
+        with override_settings(DATABASE_ROUTING={
+            'REPLICAS': [REPLICA], 'PIN_TIMEOUT': -1
+        }):
+            pin_user(self.user.pk)
+
+        self.assertFalse(is_pinned(self.user.pk))
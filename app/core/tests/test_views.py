@@ -0,0 +1,139 @@
+"""
+Tests for the health check endpoints
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db.utils import OperationalError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from core.views import probe_cache
+from recipes.cache import stats
+
+
+HEALTHZ_URL = reverse('healthz')
+READYZ_URL = reverse('readyz')
+STATSZ_URL = reverse('statsz')
+
+
+class HealthCheckTests(TestCase):
+    """
+    Test the liveness and readiness endpoints
+    """
+
+    def setUp(self):
+        probe_cache.clear()
+
+    def test_healthz_skips_database(self):
+        """
+        Test liveness is reported without a query
+        """
+        with self.assertNumQueries(0):
+            res = self.client.get(HEALTHZ_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), {'status': 'ok'})
+
+    def test_readyz_probe_cached(self):
+        """
+        Test readiness probes the database once within the TTL
+        """
+        with self.assertNumQueries(1):
+            res = self.client.get(READYZ_URL)
+        with self.assertNumQueries(0):
+            self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()['databases'], {'default': 'ok'})
+
+    @override_settings(READINESS_PROBE={'TTL': -1})
+    def test_readyz_probes_again_after_ttl(self):
+        """
+        Test an expired result is probed again
+        """
+        self.client.get(READYZ_URL)
+
+        with self.assertNumQueries(1):
+            self.client.get(READYZ_URL)
+
+    @patch('django.db.backends.utils.CursorWrapper.execute')
+    def test_readyz_database_unavailable(self, patched_execute):
+        """
+        Test readiness fails while a database is unreachable
+        """
+        patched_execute.side_effect = OperationalError('gone away')
+
+        res = self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res.json()['status'], 'unavailable')
+        self.assertIn('gone away', res.json()['databases']['default'])
+
+
+class StatsTests(TestCase):
+    """
+    Test the staff statistics endpoint
+    """
+
+    def setUp(self):
+        stats.reset()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123'
+        )
+
+    def get(self, user=None):
+        headers = {}
+        if user is not None:
+            key = Token.objects.create(user=user).key
+            headers['HTTP_AUTHORIZATION'] = f'Token {key}'
+        return self.client.get(STATSZ_URL, **headers)
+
+    def test_statsz_requires_staff(self):
+        """
+        Test anonymous and non-staff users cannot read the statistics
+        """
+        self.assertEqual(
+            self.get().status_code, status.HTTP_401_UNAUTHORIZED
+        )
+        self.assertEqual(
+            self.get(self.user).status_code, status.HTTP_403_FORBIDDEN
+        )
+
+    def test_statsz_reports_response_cache(self):
+        """
+        Test staff see the response cache counters of the process
+        """
+        self.user.is_staff = True
+        self.user.save()
+        stats.hit()
+        stats.miss()
+        stats.miss()
+
+        res = self.get(self.user)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['response_cache'], {
+            'hits': 1,
+            'misses': 2,
+            'hit_ratio': 1 / 3,
+        })
+
+    @patch('core.views.pool_stats')
+    def test_statsz_reports_pools(self, patched_pool_stats):
+        """
+        Test staff see the connection pool counters of the process
+        """
+        patched_pool_stats.return_value = {'default': {'checkouts': 3}}
+        self.user.is_staff = True
+        self.user.save()
+
+        res = self.get(self.user)
+
+        self.assertEqual(
+            res.json()['database_pools'], {'default': {'checkouts': 3}}
+        )
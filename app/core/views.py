@@ -0,0 +1,115 @@
+"""
+Health check endpoints for orchestrators, and process statistics for staff
+"""
+import threading
+import time
+
+from django.db import connections
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.decorators import (
+    api_view,
+    authentication_classes,
+    permission_classes
+)
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from core.conf import get_settings
+from core.db.errors import connection_errors
+from core.db.pool import pool_stats
+from recipes.cache import stats as response_cache_stats
+from user.authentication import CachedTokenAuthentication
+
+
+DEFAULT_READINESS = {
+    'TTL': 5,  # seconds a probe result is reused
+    'DATABASES': None,
+}
+
+
+class ProbeCache:
+    """
+    Last database probe result of this process, reused for a short TTL
+
+    Probes are serialised, so concurrent health checks wait for one probe
+    instead of each querying the databases.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def get_or_probe(self, probe, ttl):
+        with self._lock:
+            if self._expires < time.monotonic():
+                self._result = probe()
+                self._expires = time.monotonic() + ttl
+            return self._result
+
+    def clear(self):
+        self._expires = 0
+        self._result = None
+
+
+probe_cache = ProbeCache()
+
+
+def probe_databases(aliases):
+    """
+    Return the status of each database alias
+    """
+    result = {}
+    for alias in aliases:
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('SELECT 1')
+            result[alias] = 'ok'
+        except connection_errors(alias) as error:
+            result[alias] = f'unavailable: {error}'
+
+    return result
+
+
+@require_GET
+def healthz(request):
+    """
+    Report that the process is up, without touching the database
+    """
+    return JsonResponse({'status': 'ok'})
+
+
+@require_GET
+def readyz(request):
+    """
+    Report whether every database can be reached
+    """
+    options = get_settings('READINESS_PROBE', DEFAULT_READINESS)
+    aliases = options['DATABASES'] or list(connections)
+    databases = probe_cache.get_or_probe(
+        lambda: probe_databases(aliases), options['TTL']
+    )
+    ready = all(status == 'ok' for status in databases.values())
+
+    return JsonResponse(
+        {'status': 'ok' if ready else 'unavailable', 'databases': databases},
+        status=200 if ready else 503
+    )
+
+
+@api_view(['GET'])
+@authentication_classes([CachedTokenAuthentication, SessionAuthentication])
+@permission_classes([IsAdminUser])
+def statsz(request):
+    """
+    Report the counters of this process, to size the response cache and
+    the database connection pools
+
+    Signed tokens are not accepted, they carry no staff flag.
+    """
+    return Response({
+        'response_cache': response_cache_stats.snapshot(),
+        'database_pools': pool_stats(),
+    })
@@ -0,0 +1,87 @@
+"""
+Async views for the recipe API
+"""
+from asgiref.sync import sync_to_async
+
+from rest_framework import status
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+
+from core.async_views import (
+    async_api_view,
+    json_response,
+    method_not_allowed,
+    parse_json,
+)
+from core.models import Recipe
+from recipes import serializers
+from recipes.fastpath import get_field_plan
+from recipes.pagination import RecipeCursorPagination
+
+
+def list_recipes(request):
+    """
+    Return a page of the user's recipes, as the sync list endpoint does
+    """
+    plan = get_field_plan(serializers.RecipeSerializer)
+    queryset = Recipe.objects.filter(
+        user=request.user
+    ).order_by('-id').values_list(*plan.columns, named=True)
+    paginator = RecipeCursorPagination()
+    drf_request = Request(request)
+    # The wrapper has no authenticators; hand it the authenticated user
+    # the paginator reads recipe_count for
+    drf_request.user = request.user
+    page = paginator.paginate_queryset(queryset, drf_request)
+
+    return paginator.get_paginated_response(plan.render_rows(page)).data
+
+
+def create_recipe(request, data):
+    """
+    Validate and save a new recipe for the user
+    """
+    serializer = serializers.RecipeDetailSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+    serializer.save(user=request.user)
+
+    return serializer.data
+
+
+def retrieve_recipe(request, pk):
+    """
+    Return one of the user's recipes
+    """
+    recipe = Recipe.objects.filter(user=request.user, pk=pk).first()
+    if recipe is None:
+        raise NotFound()
+
+    return serializers.RecipeDetailSerializer(recipe).data
+
+
+@async_api_view
+async def recipe_list(request):
+    """
+    List or create recipes without holding a worker thread
+    """
+    if request.method == 'GET':
+        data = await sync_to_async(list_recipes)(request)
+        return json_response(data)
+
+    if request.method == 'POST':
+        data = await sync_to_async(create_recipe)(request, parse_json(request))
+        return json_response(data, status_code=status.HTTP_201_CREATED)
+
+    return method_not_allowed(request)
+
+
+@async_api_view
+async def recipe_detail(request, pk):
+    """
+    Retrieve a recipe without holding a worker thread
+    """
+    if request.method == 'GET':
+        data = await sync_to_async(retrieve_recipe)(request, pk)
+        return json_response(data)
+
+    return method_not_allowed(request)
@@ -0,0 +1,178 @@
+"""
+Per-user response cache for the recipe API
+"""
+import hashlib
+import threading
+import time
+
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.conf import get_settings
+
+
+# Response headers stored with the cached data
+CACHED_HEADERS = ('ETag', 'Last-Modified')
+
+DEFAULT_RESPONSE_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': 60,
+}
+
+
+def get_cache():
+    options = get_settings('RECIPE_RESPONSE_CACHE', DEFAULT_RESPONSE_CACHE)
+    return caches[options['ALIAS']]
+
+
+class CacheStats:
+    """
+    Hit and miss counters of the response cache in this process
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def snapshot(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0.0,
+            }
+
+
+stats = CacheStats()
+
+
+def generation_key(user_id):
+    return f'recipes:gen:{user_id}'
+
+
+def get_generation(user_id):
+    """
+    Return the current cache generation for a user's recipes
+
+    A missing generation starts from the current time in milliseconds,
+    so a generation evicted from the cache never comes back with a value
+    that old entries were stored under.
+    """
+    cache = get_cache()
+    key = generation_key(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        generation = cache.get(key)
+
+    return generation
+
+
+def bump_generation(user_id):
+    """
+    Invalidate every cached response for a user's recipes
+    """
+    cache = get_cache()
+    key = generation_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+
+
+def response_cache_key(request, action, kwargs):
+    """
+    Return the cache key of a response for the user, action, query and
+    negotiated media type
+    """
+    user_id = request.user.pk
+    digest = hashlib.md5(repr((
+        request.get_host(),
+        request.accepted_media_type,
+        sorted(kwargs.items()),
+        sorted(request.query_params.lists()),
+    )).encode()).hexdigest()
+
+    return (
+        f'recipes:resp:{user_id}:{get_generation(user_id)}:'
+        f'{action}:{digest}'
+    )
+
+
+class ResponseCacheMixin:
+    """
+    Serve list and retrieve responses from the per-user response cache
+
+    Recipe writes bump the user's generation through recipes_changed, see
+    recipes.signals, whether they come from the API, the admin or a shell.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        """
+        Return the cached response data or call the handler and cache it
+
+        Validators cached with the data let a hit still answer
+        conditional requests with 304.
+        """
+        cache = get_cache()
+        key = response_cache_key(request, self.action, kwargs)
+        entry = cache.get(key)
+
+        if entry is not None:
+            stats.hit()
+            headers = entry['headers']
+            response = Response(entry['data'], headers=headers)
+            response = get_conditional_response(
+                request,
+                etag=headers.get('ETag'),
+                last_modified=parse_http_date_safe(
+                    headers.get('Last-Modified', '')
+                ),
+                response=response
+            )
+            response['X-Cache'] = 'HIT'
+            return response
+
+        stats.miss()
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            entry = {
+                'data': response.data,
+                'headers': {
+                    name: response[name]
+                    for name in CACHED_HEADERS if response.has_header(name)
+                },
+            }
+            options = get_settings(
+                'RECIPE_RESPONSE_CACHE', DEFAULT_RESPONSE_CACHE
+            )
+            cache.set(key, entry, options['TIMEOUT'])
+        response['X-Cache'] = 'MISS'
+
+        return response
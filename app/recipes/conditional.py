@@ -0,0 +1,80 @@
+"""
+Conditional GET support for the recipe API
+"""
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from recipes.cache import get_generation
+
+
+def make_etag(*parts):
+    return '"' + hashlib.md5(repr(parts).encode()).hexdigest() + '"'
+
+
+class ConditionalGetMixin:
+    """
+    Answer If-None-Match on list and retrieve, and If-Modified-Since on
+    retrieve
+
+    The list ETag comes from the user's response cache generation, which
+    every recipe write moves on, so a 304 costs no query. The list has no
+    Last-Modified, as the generation carries no time. ETags include the
+    negotiated media type, so a JSON validator never matches a MessagePack
+    response.
+    """
+
+    def list(self, request, *args, **kwargs):
+        etag = make_etag(
+            request.user.pk,
+            get_generation(request.user.pk),
+            request.accepted_media_type,
+            request.get_full_path()
+        )
+        return self.conditional_response(
+            etag, None, super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        try:
+            last_modified = self.get_queryset().filter(
+                **{self.lookup_field: lookup}
+            ).values_list('updated_at', flat=True).first()
+        except (TypeError, ValueError, ValidationError):
+            last_modified = None
+
+        if last_modified is None:
+            # Let the handler produce the usual 404
+            return super().retrieve(request, *args, **kwargs)
+
+        etag = make_etag(
+            lookup,
+            last_modified,
+            request.accepted_media_type,
+            request.get_full_path()
+        )
+        return self.conditional_response(
+            etag, last_modified,
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def conditional_response(self, etag, last_modified, handler, request,
+                             *args, **kwargs):
+        """
+        Return 304 if the client's copy is current, else call the handler
+        """
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+
+        return response
@@ -0,0 +1,117 @@
+"""
+Model-free serialization of recipe rows
+"""
+from functools import lru_cache
+
+from rest_framework import serializers
+from rest_framework.response import Response
+
+
+# Fields whose to_representation() returns database values unchanged
+PASSTHROUGH_FIELDS = (serializers.IntegerField, serializers.CharField)
+
+
+class FieldPlan:
+    """
+    Precompiled mapping from ``values_list`` rows to serializer output
+
+    Built once from a serializer's fields, it produces the same data as
+    the serializer without constructing model instances or walking the
+    serializer machinery per field.
+    """
+
+    def __init__(self, serializer):
+        self.names = []
+        self.columns = []
+        self.converters = []
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            self.names.append(name)
+            self.columns.append(field.source)
+            # Exact class checks; subclasses may format values
+            if type(field) in PASSTHROUGH_FIELDS:
+                self.converters.append(None)
+            else:
+                self.converters.append(field.to_representation)
+
+        # Keyset pagination reads the id from every row
+        if 'id' not in self.columns:
+            self.columns.append('id')
+
+        self.steps = list(zip(
+            self.names, range(len(self.names)), self.converters
+        ))
+
+    @classmethod
+    def supports(cls, serializer):
+        """
+        Return whether every field maps to a single model column
+        """
+        return all(
+            not isinstance(field, serializers.SerializerMethodField) and
+            len(field.source_attrs) == 1
+            for field in serializer.fields.values()
+        )
+
+    def to_representation(self, row):
+        data = {}
+        for name, index, converter in self.steps:
+            value = row[index]
+            if value is not None and converter is not None:
+                value = converter(value)
+            data[name] = value
+
+        return data
+
+    def render_rows(self, rows):
+        to_representation = self.to_representation
+        return [to_representation(row) for row in rows]
+
+
+@lru_cache(maxsize=64)
+def get_field_plan(serializer_class, fields=None):
+    """
+    Return the cached plan of a serializer class, or None if unsupported
+    """
+    kwargs = {'fields': list(fields)} if fields is not None else {}
+    serializer = serializer_class(**kwargs)
+    if not FieldPlan.supports(serializer):
+        return None
+
+    return FieldPlan(serializer)
+
+
+class FastListMixin:
+    """
+    List recipes from ``values_list`` rows through a precompiled plan
+    """
+    fast_list = True
+
+    def get_field_plan(self):
+        """
+        Return the field plan for the request, or None to use serializers
+        """
+        if not self.fast_list:
+            return None
+        fields = self.get_requested_fields()
+
+        return get_field_plan(
+            self.get_serializer_class(),
+            tuple(fields) if fields is not None else None
+        )
+
+    def list(self, request, *args, **kwargs):
+        plan = self.get_field_plan()
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset()).values_list(
+            *plan.columns, named=True
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(plan.render_rows(page))
+
+        return Response(plan.render_rows(queryset))
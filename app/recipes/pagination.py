@@ -0,0 +1,74 @@
+"""
+Pagination for the recipe API
+"""
+from collections import OrderedDict
+
+from django.contrib.auth import get_user_model
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, Cursor
+
+
+class RecipeCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the recipe primary key
+
+    Pages are selected with ``WHERE id < <position>`` so no OFFSET scan or
+    COUNT(*) is ever issued, whatever page the client is on. The total is
+    the user's maintained recipe_count, read by primary key.
+    """
+    ordering = '-id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def decode_cursor(self, request):
+        """
+        Decode the cursor, dropping any offset component
+
+        The ordering is on the unique primary key, so a position alone
+        always identifies the page and an offset is never needed.
+        """
+        cursor = super().decode_cursor(request)
+        if cursor is None:
+            return None
+
+        if cursor.position is not None:
+            try:
+                int(cursor.position)
+            except ValueError:
+                raise NotFound(self.invalid_cursor_message)
+
+        return Cursor(
+            offset=0,
+            reverse=cursor.reverse,
+            position=cursor.position
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_recipe_count(self):
+        """
+        Return the maintained recipe count of the requesting user
+        """
+        return get_user_model()._base_manager.filter(
+            pk=self.request.user.pk
+        ).values_list('recipe_count', flat=True).first()
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data = OrderedDict([
+            ('recipe_count', self.get_recipe_count()),
+            *response.data.items()
+        ])
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema['properties'] = {
+            'recipe_count': {'type': 'integer', 'example': 123},
+            **schema['properties'],
+        }
+        return schema
@@ -3,10 +3,24 @@ Serializers for recipe API
 """
 from rest_framework import serializers
 
-from core.models import Recipe
+from core.models import Recipe, RecipeStats
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """
+    Limit the serialized fields to the ``fields`` passed on init
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class RecipeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for Recipe Model
     """
@@ -17,10 +31,70 @@ class RecipeSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class RecipeDetailSerializer(serializers.ModelSerializer):
+class RecipeDetailSerializer(DynamicFieldsMixin,
+                             serializers.ModelSerializer):
     """
     Serializer for Recipe Detail
     """
 
     class Meta(RecipeSerializer.Meta):
         fields = RecipeSerializer.Meta.fields + ['description']
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    """
+    Serializer for a list of recipe ids targeted by a bulk operation
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False
+    )
+
+    def validate_ids(self, value):
+        max_items = self.context.get('max_items')
+        if max_items and len(value) > max_items:
+            raise serializers.ValidationError(
+                f'Ensure there are no more than {max_items} ids.'
+            )
+
+        return list(dict.fromkeys(value))
+
+
+class RecipeBulkUpdateSerializer(RecipeIdsSerializer):
+    """
+    Serializer for applying the same changes to many recipes
+    """
+    changes = serializers.DictField(allow_empty=False)
+
+
+class RecipePriceStatsSerializer(serializers.Serializer):
+    """
+    Serializer for the price aggregates of a user's recipes
+    """
+    total = serializers.DecimalField(
+        max_digits=14, decimal_places=2, source='price_total'
+    )
+    average = serializers.DecimalField(
+        max_digits=5, decimal_places=2, source='price_average'
+    )
+    min = serializers.DecimalField(
+        max_digits=5, decimal_places=2, source='price_min'
+    )
+    max = serializers.DecimalField(
+        max_digits=5, decimal_places=2, source='price_max'
+    )
+
+
+class RecipeStatsSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the precomputed statistics of a user's recipes
+    """
+    price = RecipePriceStatsSerializer(source='*', read_only=True)
+    time_minutes = serializers.ListField(
+        source='time_histogram', read_only=True
+    )
+
+    class Meta:
+        model = RecipeStats
+        fields = ['count', 'price', 'time_minutes']
+        read_only_fields = fields
@@ -0,0 +1,20 @@
+"""
+Signal handlers keeping the recipe response cache consistent
+"""
+from django.dispatch import receiver
+
+from core.signals import recipes_changed
+from recipes.cache import bump_generation
+from user.signals import evict_now_and_on_commit
+
+
+@receiver(recipes_changed)
+def recipes_written(sender, user_ids, using, **kwargs):
+    """
+    Invalidate the cached responses of users whose recipes changed
+    """
+    def bump():
+        for user_id in user_ids:
+            bump_generation(user_id)
+
+    evict_now_and_on_commit(bump, using)
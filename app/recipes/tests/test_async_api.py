@@ -0,0 +1,210 @@
+"""
+Tests for the async recipe and user API
+"""
+from decimal import Decimal
+
+import orjson
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, TransactionTestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from app.asgi import application
+from core.models import Recipe
+from recipes.serializers import RecipeDetailSerializer
+from user.authentication import local_token_cache
+
+
+ASYNC_RECIPES_URL = reverse('recipes:async-recipe-list')
+ASYNC_ME_URL = reverse('user:async-me')
+
+
+def async_detail_url(recipe_id):
+    """
+    Create and return an async recipe detail URL
+    """
+    return reverse('recipes:async-recipe-detail', args=[recipe_id])
+
+
+class AsyncAPITests(TransactionTestCase):
+    """
+    Test the async endpoints
+
+    Each async request runs its ORM calls in its own thread, so the tests
+    commit their fixtures rather than holding them in a transaction.
+    """
+
+    def setUp(self):
+        cache.clear()
+        local_token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='name@domain.com',
+            password='testpass123',
+            name='Test Name'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = AsyncClient()
+        self.auth = {'authorization': f'Token {self.token.key}'}
+
+    def create_recipe(self, user, **params):
+        defaults = {
+            'title': 'Sample recipe title',
+            'time_minutes': 22,
+            'price': Decimal('5.25'),
+        }
+        defaults.update(params)
+        return Recipe.objects.create(user=user, **defaults)
+
+    async def test_auth_required(self):
+        """
+        Test async endpoints reject unauthenticated requests
+        """
+        res = await self.client.get(ASYNC_RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_list_recipes(self):
+        """
+        Test listing recipes matches the sync endpoint's data
+        """
+        await sync_to_async(self.create_recipe)(self.user, title='First')
+        await sync_to_async(self.create_recipe)(self.user, title='Second')
+        other = await sync_to_async(get_user_model().objects.create_user)(
+            email='othername@domain.com',
+            password='testpass123'
+        )
+        await sync_to_async(self.create_recipe)(other)
+
+        res = await self.client.get(ASYNC_RECIPES_URL, **self.auth)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        titles = [r['title'] for r in res.json()['results']]
+        self.assertEqual(titles, ['Second', 'First'])
+        self.assertEqual(res.json()['recipe_count'], 2)
+
+    async def test_create_recipe(self):
+        """
+        Test creating a recipe through the async endpoint
+        """
+        res = await self.client.post(
+            ASYNC_RECIPES_URL,
+            orjson.dumps({
+                'title': 'Async recipe',
+                'time_minutes': 5,
+                'price': '2.50'
+            }),
+            content_type='application/json',
+            **self.auth
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = await sync_to_async(Recipe.objects.get)(id=res.json()['id'])
+        self.assertEqual(recipe.user_id, self.user.id)
+        self.assertEqual(recipe.price, Decimal('2.50'))
+
+    async def test_create_recipe_invalid(self):
+        """
+        Test invalid recipes are rejected with field errors
+        """
+        res = await self.client.post(
+            ASYNC_RECIPES_URL,
+            orjson.dumps({'title': 'No time'}),
+            content_type='application/json',
+            **self.auth
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('time_minutes', res.json())
+
+    async def test_retrieve_recipe(self):
+        """
+        Test retrieving a recipe matches the detail serializer
+        """
+        recipe = await sync_to_async(self.create_recipe)(self.user)
+        expected = await sync_to_async(
+            lambda: RecipeDetailSerializer(recipe).data
+        )()
+
+        res = await self.client.get(async_detail_url(recipe.id), **self.auth)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), expected)
+
+    async def test_retrieve_other_users_recipe(self):
+        """
+        Test another user's recipe is not found
+        """
+        other = await sync_to_async(get_user_model().objects.create_user)(
+            email='othername@domain.com',
+            password='testpass123'
+        )
+        recipe = await sync_to_async(self.create_recipe)(other)
+
+        res = await self.client.get(async_detail_url(recipe.id), **self.auth)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_manage_user(self):
+        """
+        Test retrieving and updating the user asynchronously
+        """
+        res = await self.client.get(ASYNC_ME_URL, **self.auth)
+        self.assertEqual(res.json(), {
+            'email': 'name@domain.com',
+            'name': 'Test Name',
+            'recipe_count': 0
+        })
+
+        res = await self.client.patch(
+            ASYNC_ME_URL,
+            orjson.dumps({'name': 'Async Name'}),
+            content_type='application/json',
+            **self.auth
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        await sync_to_async(self.user.refresh_from_db)()
+        self.assertEqual(self.user.name, 'Async Name')
+
+    async def test_delete_user(self):
+        """
+        Test deleting the user asynchronously queues the deletion
+        """
+        res = await self.client.delete(ASYNC_ME_URL, **self.auth)
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.json()['status'], 'pending')
+        await sync_to_async(self.user.refresh_from_db)()
+        self.assertFalse(self.user.is_active)
+
+    async def test_served_by_asgi_application(self):
+        """
+        Test the project's ASGI application serves the async endpoints
+        """
+        communicator = ApplicationCommunicator(application, {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': ASYNC_ME_URL,
+            'query_string': b'',
+            'server': ('testserver', 80),
+            'headers': [
+                (b'host', b'testserver'),
+                (b'authorization', self.auth['authorization'].encode()),
+            ],
+        })
+        await communicator.send_input({'type': 'http.request'})
+
+        start = await communicator.receive_output(timeout=5)
+        body = await communicator.receive_output(timeout=5)
+
+        self.assertEqual(start['status'], status.HTTP_200_OK)
+        self.assertEqual(orjson.loads(body['body'])['email'], self.user.email)
@@ -0,0 +1,76 @@
+"""
+Tests for the model-free recipe serialization path
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Recipe
+
+from recipes.fastpath import get_field_plan
+from recipes.serializers import RecipeSerializer, RecipeDetailSerializer
+
+
+class FieldPlanTests(TestCase):
+    """
+    Test field plans match the serializers they are built from
+    """
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email='name@domain.com',
+            password='testpass123'
+        )
+        prices = ['5.5', '0', '999.99', '0.01', '12.30']
+        for i, price in enumerate(prices):
+            Recipe.objects.create(
+                user=user,
+                title=f'Recipe “{i}”\n',
+                time_minutes=i * 7,
+                price=Decimal(price),
+                description='' if i % 2 else 'Some description',
+                link='' if i % 2 else f'http://example.com/{i}.pdf'
+            )
+        self.queryset = Recipe.objects.order_by('-id')
+
+    def assertRenderedEqual(self, serializer_class, fields=None):
+        plan = get_field_plan(serializer_class, fields)
+        kwargs = {'fields': list(fields)} if fields is not None else {}
+        expected = serializer_class(self.queryset, many=True, **kwargs).data
+        rows = self.queryset.values_list(*plan.columns, named=True)
+
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render(plan.render_rows(rows)),
+            renderer.render(expected)
+        )
+
+    def test_list_serializer_parity(self):
+        """
+        Test the list plan renders byte for byte like RecipeSerializer
+        """
+        self.assertRenderedEqual(RecipeSerializer)
+
+    def test_detail_serializer_parity(self):
+        """
+        Test the detail plan renders like RecipeDetailSerializer
+        """
+        self.assertRenderedEqual(RecipeDetailSerializer)
+
+    def test_sparse_fields_parity(self):
+        """
+        Test a plan limited to some fields renders like the serializer
+        """
+        self.assertRenderedEqual(RecipeSerializer, ('title', 'price'))
+
+    def test_plan_cached(self):
+        """
+        Test plans are compiled once per serializer and fields
+        """
+        self.assertIs(
+            get_field_plan(RecipeSerializer),
+            get_field_plan(RecipeSerializer)
+        )
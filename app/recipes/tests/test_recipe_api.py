@@ -1,24 +1,35 @@
 """
 Tests for recipe API
 """
+import json
 from decimal import Decimal
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Recipe
+from core.models import Recipe, RecipeStats
 
+from recipes.cache import stats
+from recipes.pagination import RecipeCursorPagination
 from recipes.serializers import (
     RecipeSerializer,
     RecipeDetailSerializer,
 )
+from recipes.views import RecipeViewSet
 
 
 RECIPES_URL = reverse('recipes:recipe-list')
+BULK_URL = reverse('recipes:recipe-bulk')
+STREAM_URL = reverse('recipes:recipe-stream')
+STATS_URL = reverse('recipes:recipe-stats')
 
 
 def detail_url(recipe_id):
@@ -83,6 +94,7 @@ class PrivateRecipeAPITests(TestCase):
     Test authenticated API requests
     """
     def setUp(self):
+        cache.clear()
         self.user = create_user(
             email='name@domain.com',
             password='testpass123',
@@ -105,7 +117,7 @@ class PrivateRecipeAPITests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipe_list_limited_to_user(self):
         """
@@ -126,7 +138,7 @@ class PrivateRecipeAPITests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_get_recipe_detail(self):
         """
@@ -275,3 +287,785 @@ class PrivateRecipeAPITests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
         self.assertTrue(Recipe.objects.filter(id=recipe.id).exists())
+
+    def test_list_paginated_with_cursor(self):
+        """
+        Test recipes are paged by cursor in descending id order
+        """
+        recipes = [
+            create_recipe(user=self.user, title=f'Recipe {i}')
+            for i in range(5)
+        ]
+
+        res = self.client.get(RECIPES_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', res.data)
+        self.assertIsNone(res.data['previous'])
+        self.assertEqual(
+            [r['id'] for r in res.data['results']],
+            [recipes[4].id, recipes[3].id]
+        )
+
+        res = self.client.get(res.data['next'])
+
+        self.assertEqual(
+            [r['id'] for r in res.data['results']],
+            [recipes[2].id, recipes[1].id]
+        )
+        self.assertIsNotNone(res.data['previous'])
+
+    def test_list_includes_recipe_count(self):
+        """
+        Test list responses carry the user's total recipe count
+        """
+        for i in range(3):
+            create_recipe(user=self.user, title=f'Recipe {i}')
+        create_recipe(user=create_user(
+            email='other@example.com', password='testpass123'
+        ))
+
+        res = self.client.get(RECIPES_URL, {'page_size': 2})
+
+        self.assertEqual(res.data['recipe_count'], 3)
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_list_page_size_capped(self):
+        """
+        Test the client cannot request more than the maximum page size
+        """
+        for i in range(3):
+            create_recipe(user=self.user, title=f'Recipe {i}')
+
+        with patch.object(RecipeCursorPagination, 'max_page_size', 2):
+            res = self.client.get(RECIPES_URL, {'page_size': 100})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIsNotNone(res.data['next'])
+
+    def test_stream_all_recipes(self):
+        """
+        Test streaming returns every recipe as one JSON array
+        """
+        other_user = create_user(
+            email='othername@domain.com',
+            password='testpass123',
+            name='Test Name 2'
+        )
+        for i in range(5):
+            create_recipe(user=self.user, title=f'Recipe {i}')
+        create_recipe(user=other_user)
+
+        with override_settings(RECIPE_STREAM_CHUNK_SIZE=2):
+            res = self.client.get(STREAM_URL)
+            body = b''.join(res.streaming_content)
+
+        recipes = Recipe.objects.filter(user=self.user).order_by('-id')
+        serializer = RecipeSerializer(recipes, many=True)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(body), serializer.data)
+
+    def test_stream_no_recipes(self):
+        """
+        Test streaming with no recipes returns an empty array
+        """
+        res = self.client.get(STREAM_URL)
+
+        self.assertEqual(b''.join(res.streaming_content), b'[]')
+
+    def test_stream_unknown_fields_rejected(self):
+        """
+        Test unknown ?fields= get a 400 before streaming starts
+        """
+        for fast_list in (True, False):
+            with self.subTest(fast_list=fast_list), patch.object(
+                RecipeViewSet, 'fast_list', fast_list
+            ):
+                res = self.client.get(STREAM_URL, {'fields': 'bogus'})
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertFalse(res.streaming)
+
+    def test_list_sparse_fields(self):
+        """
+        Test ?fields= limits the output and the columns selected
+        """
+        create_recipe(user=self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPES_URL, {'fields': 'title,id'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(res.data['results'][0]), ['id', 'title'])
+        select = [
+            q['sql'] for q in queries.captured_queries
+            if 'core_recipe' in q['sql'] and 'LIMIT' in q['sql']
+        ][0]
+        self.assertNotIn('price', select)
+        self.assertNotIn('description', select)
+
+    def test_list_sparse_fields_without_id_paginates(self):
+        """
+        Test pages link correctly when the id is not requested
+        """
+        create_recipe(user=self.user, title='First')
+        create_recipe(user=self.user, title='Second')
+
+        res = self.client.get(RECIPES_URL, {'fields': 'title', 'page_size': 1})
+        res = self.client.get(res.data['next'])
+
+        self.assertEqual(res.data['results'], [{'title': 'First'}])
+
+    def test_detail_sparse_fields(self):
+        """
+        Test ?fields= limits the recipe detail output
+        """
+        recipe = create_recipe(user=self.user)
+
+        res = self.client.get(detail_url(recipe.id), {'fields': 'description'})
+
+        self.assertEqual(res.data, {'description': recipe.description})
+
+    def test_sparse_fields_unknown_error(self):
+        """
+        Test requesting an unknown field returns an error
+        """
+        res = self.client.get(RECIPES_URL, {'fields': 'id,user'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_invalid_cursor_error(self):
+        """
+        Test a malformed cursor returns not found
+        """
+        res = self.client.get(RECIPES_URL, {'cursor': 'cD1hYmM='})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class RecipeResponseCacheTests(TestCase):
+    """
+    Test the per-user recipe response cache
+    """
+    def setUp(self):
+        cache.clear()
+        stats.reset()
+        self.user = create_user(
+            email='name@domain.com',
+            password='testpass123',
+            name='Test Name'
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_served_from_cache(self):
+        """
+        Test a repeated list request is a cache hit without queries
+        """
+        create_recipe(user=self.user)
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(res['X-Cache'], 'MISS')
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(RECIPES_URL)
+
+        self.assertEqual(cached['X-Cache'], 'HIT')
+        self.assertEqual(cached.data, res.data)
+        self.assertEqual(stats.snapshot()['hits'], 1)
+        self.assertEqual(stats.snapshot()['misses'], 1)
+
+    def test_query_params_cached_separately(self):
+        """
+        Test different query parameters do not share a cache entry
+        """
+        create_recipe(user=self.user)
+        self.client.get(RECIPES_URL)
+
+        res = self.client.get(RECIPES_URL, {'page_size': 1})
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+
+    def test_create_invalidates_cache(self):
+        """
+        Test creating a recipe invalidates the cached list
+        """
+        self.client.get(RECIPES_URL)
+        self.client.post(RECIPES_URL, {
+            'title': 'Sample recipe title',
+            'time_minutes': 22,
+            'price': Decimal('5.25'),
+        })
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_update_invalidates_cached_detail(self):
+        """
+        Test updating a recipe invalidates its cached detail
+        """
+        recipe = create_recipe(user=self.user)
+        url = detail_url(recipe.id)
+        self.client.get(url)
+
+        self.client.patch(url, {'title': 'New recipe title'})
+        res = self.client.get(url)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['title'], 'New recipe title')
+
+    def test_delete_invalidates_cached_detail(self):
+        """
+        Test deleting a recipe invalidates its cached detail
+        """
+        recipe = create_recipe(user=self.user)
+        url = detail_url(recipe.id)
+        self.client.get(url)
+
+        self.client.delete(url)
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cache_not_shared_between_users(self):
+        """
+        Test one user's cached list is not served to another user
+        """
+        create_recipe(user=self.user)
+        self.client.get(RECIPES_URL)
+        other_user = create_user(
+            email='othername@domain.com',
+            password='testpass123',
+            name='Test Name 2'
+        )
+        self.client.force_authenticate(user=other_user)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['results'], [])
+
+    def test_model_writes_invalidate_cache(self):
+        """
+        Test recipe writes outside the API, e.g. from the admin or a
+        shell, invalidate the cached list
+        """
+        recipe = create_recipe(user=self.user)
+        recipes = Recipe.objects.filter(pk=recipe.pk)
+        writes = {
+            'save': lambda: recipe.save(),
+            'save_update_fields': lambda: recipe.save(
+                update_fields=['title']
+            ),
+            'update': lambda: recipes.update(title='New recipe title'),
+            'update_price': lambda: recipes.update(price=Decimal('1.00')),
+            'bulk_create': lambda: Recipe.objects.bulk_create([
+                Recipe(user=self.user, title='Bulk', time_minutes=5,
+                       price=Decimal('1.00'))
+            ]),
+            'delete': lambda: recipes.delete(),
+        }
+
+        for name, write in writes.items():
+            with self.subTest(write=name):
+                self.client.get(RECIPES_URL)
+                self.assertEqual(
+                    self.client.get(RECIPES_URL)['X-Cache'], 'HIT'
+                )
+
+                write()
+                res = self.client.get(RECIPES_URL)
+
+                self.assertEqual(res['X-Cache'], 'MISS')
+
+    def test_write_invalidates_again_on_commit(self):
+        """
+        Test a write bumps the generation now and once it commits
+        """
+        recipe = create_recipe(user=self.user)
+
+        with patch('recipes.signals.bump_generation') as bump, \
+                self.captureOnCommitCallbacks(execute=True) as callbacks:
+            recipe.save(update_fields=['title'])
+            bump.assert_called_once_with(self.user.pk)
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(bump.call_count, 2)
+
+
+class RecipeConditionalGetTests(TestCase):
+    """
+    Test conditional GET requests on recipes
+    """
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(
+            email='name@domain.com',
+            password='testpass123',
+            name='Test Name'
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_updated_at_tracked(self):
+        """
+        Test saving a recipe moves its modification time forward
+        """
+        recipe = create_recipe(user=self.user)
+        original = recipe.updated_at
+
+        recipe.title = 'New recipe title'
+        recipe.save()
+
+        self.assertGreater(recipe.updated_at, original)
+
+    @override_settings(RECIPE_RESPONSE_CACHE={'TIMEOUT': 0})
+    def test_list_not_modified(self):
+        """
+        Test a matching If-None-Match on the list returns 304 without
+        querying recipes
+        """
+        create_recipe(user=self.user)
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(res['X-Cache'], 'MISS')
+
+        with patch.object(RecipeSerializer, 'to_representation') as rep, \
+                self.assertNumQueries(0):
+            res = self.client.get(
+                RECIPES_URL,
+                HTTP_IF_NONE_MATCH=res['ETag']
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['X-Cache'], 'MISS')
+        rep.assert_not_called()
+
+    def test_etag_varies_with_media_type(self):
+        """
+        Test a JSON validator does not match a MessagePack response
+        """
+        recipe = create_recipe(user=self.user)
+
+        for url in (RECIPES_URL, detail_url(recipe.id)):
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+
+                res = self.client.get(
+                    url,
+                    HTTP_ACCEPT='application/msgpack',
+                    HTTP_IF_NONE_MATCH=etag
+                )
+
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(res['Content-Type'], 'application/msgpack')
+                self.assertNotEqual(res['ETag'], etag)
+
+    def test_list_etag_changes_after_write(self):
+        """
+        Test the list validator changes when a recipe is added
+        """
+        create_recipe(user=self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+        self.client.post(RECIPES_URL, {
+            'title': 'Sample recipe title',
+            'time_minutes': 22,
+            'price': Decimal('5.25'),
+        })
+
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_list_not_modified_since_ignored(self):
+        """
+        Test the list has no Last-Modified a delete could leave unchanged
+        """
+        recipe = create_recipe(user=self.user)
+        create_recipe(user=self.user)
+        res = self.client.get(RECIPES_URL)
+        self.assertFalse(res.has_header('Last-Modified'))
+
+        self.client.delete(detail_url(recipe.id))
+        res = self.client.get(
+            RECIPES_URL,
+            HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_detail_not_modified_since(self):
+        """
+        Test If-Modified-Since on an unchanged recipe returns 304
+        """
+        recipe = create_recipe(user=self.user)
+        url = detail_url(recipe.id)
+        res = self.client.get(url)
+
+        res = self.client.get(
+            url,
+            HTTP_IF_MODIFIED_SINCE=res['Last-Modified']
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_modified(self):
+        """
+        Test an updated recipe no longer matches its old ETag
+        """
+        recipe = create_recipe(user=self.user)
+        url = detail_url(recipe.id)
+        etag = self.client.get(url)['ETag']
+
+        self.client.patch(url, {'title': 'New recipe title'})
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], 'New recipe title')
+
+    def test_cached_response_not_modified(self):
+        """
+        Test a cache hit still answers conditional requests
+        """
+        create_recipe(user=self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class RecipeBulkAPITests(TestCase):
+    """
+    Test the recipe bulk endpoints
+    """
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(
+            email='name@domain.com',
+            password='testpass123',
+            name='Test Name'
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def payload(self, count, **params):
+        return [
+            {
+                'title': f'Bulk recipe {i}',
+                'time_minutes': 10 + i,
+                'price': '4.50',
+                **params
+            }
+            for i in range(count)
+        ]
+
+    def test_bulk_create(self):
+        """
+        Test creating many recipes in batched inserts
+        """
+        # The stats row is otherwise built by the user's first write
+        RecipeStats.objects.create(user=self.user)
+
+        # savepoint pair, 3 inserts, the recipe_count and stats updates
+        with self.assertNumQueries(2 + 3 + 2):
+            res = self.client.post(
+                BULK_URL + '?batch_size=2',
+                self.payload(5),
+                format='json'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data, {'created': 5, 'errors': []})
+        recipes = Recipe.objects.filter(user=self.user)
+        self.assertEqual(recipes.count(), 5)
+        self.assertEqual(recipes.filter(title='Bulk recipe 3').count(), 1)
+
+    def test_bulk_create_partial_errors(self):
+        """
+        Test invalid items are reported while valid items are created
+        """
+        items = self.payload(3)
+        items[1]['time_minutes'] = 'not a number'
+
+        res = self.client.post(BULK_URL, items, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(res.data['created'], 2)
+        self.assertEqual(res.data['errors'][0]['index'], 1)
+        self.assertIn('time_minutes', res.data['errors'][0]['errors'])
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+
+    def test_bulk_create_all_or_nothing(self):
+        """
+        Test nothing is created when requested and any item is invalid
+        """
+        items = self.payload(3)
+        items[2]['price'] = 'free'
+
+        res = self.client.post(
+            BULK_URL + '?all_or_nothing=true',
+            items,
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+
+    def test_bulk_create_requires_list(self):
+        """
+        Test a single object is rejected by the bulk endpoint
+        """
+        res = self.client.post(BULK_URL, self.payload(1)[0], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_ignores_user(self):
+        """
+        Test bulk created recipes always belong to the requester
+        """
+        other_user = create_user(
+            email='othername@domain.com',
+            password='testpass123',
+            name='Test Name 2'
+        )
+
+        self.client.post(
+            BULK_URL,
+            self.payload(2, user=other_user.id),
+            format='json'
+        )
+
+        self.assertFalse(Recipe.objects.filter(user=other_user).exists())
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+
+    def test_bulk_update_same_changes(self):
+        """
+        Test applying the same change to many recipes in one statement
+        """
+        recipes = [create_recipe(user=self.user) for _ in range(3)]
+        ids = [recipes[0].id, recipes[1].id]
+
+        res = self.client.patch(
+            BULK_URL,
+            {'ids': ids, 'changes': {'price': '9.99'}},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'updated': 2})
+        for recipe in recipes:
+            recipe.refresh_from_db()
+        self.assertEqual(recipes[0].price, Decimal('9.99'))
+        self.assertEqual(recipes[1].price, Decimal('9.99'))
+        self.assertEqual(recipes[2].price, Decimal('5.25'))
+
+    def test_bulk_update_invalid_changes(self):
+        """
+        Test invalid bulk changes are rejected
+        """
+        recipe = create_recipe(user=self.user)
+
+        res = self.client.patch(
+            BULK_URL,
+            {'ids': [recipe.id], 'changes': {'time_minutes': 'soon'}},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_update_each(self):
+        """
+        Test applying different changes to each recipe
+        """
+        first = create_recipe(user=self.user)
+        second = create_recipe(user=self.user)
+
+        res = self.client.patch(BULK_URL, [
+            {'id': first.id, 'title': 'First title'},
+            {'id': second.id, 'time_minutes': 99},
+        ], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['updated'], 2)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.title, 'First title')
+        self.assertEqual(first.time_minutes, 22)
+        self.assertEqual(second.title, 'Sample recipe title')
+        self.assertEqual(second.time_minutes, 99)
+
+    def test_bulk_update_each_duplicate_id(self):
+        """
+        Test a recipe listed twice is reported instead of overwritten
+        """
+        recipe = create_recipe(user=self.user)
+
+        res = self.client.patch(BULK_URL, [
+            {'id': recipe.id, 'title': 'New title'},
+            {'id': recipe.id, 'price': '9.00'},
+        ], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(res.data['updated'], 1)
+        self.assertEqual(res.data['errors'], [{'index': 1, 'errors': {
+            'id': ['Already listed at index 0.']
+        }}])
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'New title')
+        self.assertEqual(recipe.price, Decimal('5.25'))
+
+    def test_bulk_update_each_bool_id(self):
+        """
+        Test true is not accepted as a recipe id
+        """
+        recipe = create_recipe(user=self.user)
+
+        res = self.client.patch(
+            BULK_URL, [{'id': True, 'title': 'Taken'}], format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(res.data['errors'], [{'index': 0, 'errors': {
+            'id': ['A recipe id is required.']
+        }}])
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Sample recipe title')
+
+    def test_bulk_update_other_users_recipe(self):
+        """
+        Test bulk updates cannot touch another user's recipes
+        """
+        other_user = create_user(
+            email='othername@domain.com',
+            password='testpass123',
+            name='Test Name 2'
+        )
+        recipe = create_recipe(user=other_user)
+
+        res = self.client.patch(
+            BULK_URL,
+            {'ids': [recipe.id], 'changes': {'title': 'Taken'}},
+            format='json'
+        )
+        each = self.client.patch(
+            BULK_URL,
+            [{'id': recipe.id, 'title': 'Taken'}],
+            format='json'
+        )
+
+        self.assertEqual(res.data, {'updated': 0})
+        self.assertEqual(each.status_code, status.HTTP_207_MULTI_STATUS)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Sample recipe title')
+
+    def test_bulk_delete(self):
+        """
+        Test deleting many recipes and only the requester's
+        """
+        other_user = create_user(
+            email='othername@domain.com',
+            password='testpass123',
+            name='Test Name 2'
+        )
+        mine = [create_recipe(user=self.user) for _ in range(3)]
+        theirs = create_recipe(user=other_user)
+
+        res = self.client.delete(
+            BULK_URL,
+            {'ids': [mine[0].id, mine[1].id, theirs.id]},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'deleted': 2})
+        self.assertEqual(
+            list(Recipe.objects.filter(user=self.user)), [mine[2]]
+        )
+        self.assertTrue(Recipe.objects.filter(id=theirs.id).exists())
+
+
+class RecipeStatsAPITests(TestCase):
+    """
+    Test the precomputed recipe statistics endpoint
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(
+            email='name@domain.com',
+            password='testpass123',
+            name='Test Name'
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_stats_without_recipes(self):
+        """
+        Test a user without recipes gets empty statistics
+        """
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['count'], 0)
+        self.assertEqual(res.data['price'], {
+            'total': '0.00', 'average': None, 'min': None, 'max': None
+        })
+        self.assertEqual(
+            [bucket['count'] for bucket in res.data['time_minutes']],
+            [0, 0, 0, 0, 0]
+        )
+
+    def test_stats(self):
+        """
+        Test the statistics cover only the user's recipes
+        """
+        create_recipe(user=self.user, price=Decimal('2.00'), time_minutes=10)
+        create_recipe(user=self.user, price=Decimal('5.00'), time_minutes=70)
+        create_recipe(
+            user=create_user(email='other@example.com', password='pass123'),
+            price=Decimal('99.00')
+        )
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.data['count'], 2)
+        self.assertEqual(res.data['price'], {
+            'total': '7.00', 'average': '3.50', 'min': '2.00', 'max': '5.00'
+        })
+        self.assertEqual(res.data['time_minutes'][0], {
+            'from': 0, 'to': 15, 'count': 1
+        })
+        self.assertEqual(res.data['time_minutes'][-1], {
+            'from': 120, 'to': None, 'count': 0
+        })
+
+    def test_stats_cached_until_write(self):
+        """
+        Test statistics are served from cache and refreshed after a write
+        """
+        create_recipe(user=self.user)
+        self.client.get(STATS_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(STATS_URL)
+        self.assertEqual(res['X-Cache'], 'HIT')
+
+        self.client.post(
+            RECIPES_URL,
+            {'title': 'New', 'time_minutes': 5, 'price': '1.00'}
+        )
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['count'], 2)
+        self.assertEqual(res.data['price']['min'], '1.00')
@@ -8,7 +8,7 @@ from django.urls import (
 
 from rest_framework.routers import DefaultRouter
 
-from recipes import views
+from recipes import async_views, views
 
 
 router = DefaultRouter()
@@ -17,5 +17,15 @@ router.register('recipe', views.RecipeViewSet)
 app_name = 'recipes'
 
 urlpatterns = [
-    path('', include(router.urls))
+    path('', include(router.urls)),
+    path(
+        'async/recipe/',
+        async_views.recipe_list,
+        name='async-recipe-list'
+    ),
+    path(
+        'async/recipe/<int:pk>/',
+        async_views.recipe_detail,
+        name='async-recipe-detail'
+    ),
 ]
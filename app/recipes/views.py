@@ -1,36 +1,122 @@
 """
 Views for Recipe API
 """
-from rest_framework import viewsets
-from rest_framework.authentication import TokenAuthentication
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
-from core.models import Recipe
+from core.conf import get_settings
+from core.models import Recipe, RecipeStats
+from core.renderers import ORJSONRenderer
+from core.routers import ReplicaReadMixin
 from recipes import serializers
+from recipes.cache import ResponseCacheMixin
+from recipes.conditional import ConditionalGetMixin
+from recipes.fastpath import FastListMixin
+from recipes.pagination import RecipeCursorPagination
+from user.authentication import (
+    CachedTokenAuthentication,
+    SignedTokenAuthentication
+)
+
+
+DEFAULT_BULK_SETTINGS = {
+    'MAX_ITEMS': 10000,
+    'BATCH_SIZE': 500,  # rows per INSERT unless ?batch_size= is given
+    'MAX_BATCH_SIZE': 2000,
+}
+
+DEFAULT_STREAM_CHUNK_SIZE = 1000
+
+# Actions honouring ?fields=
+SPARSE_FIELDS_ACTIONS = ('list', 'retrieve', 'stream')
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+def query_flag(request, name):
+    """
+    Return whether a boolean query parameter is set
+    """
+    return request.query_params.get(name, '').lower() in ('1', 'true', 'yes')
+
+
+class RecipeViewSet(ReplicaReadMixin,
+                    ResponseCacheMixin,
+                    ConditionalGetMixin,
+                    FastListMixin,
+                    viewsets.ModelViewSet):
     """
     View for manage Recipe APIs
     """
+    replica_actions = ('list', 'retrieve', 'stats')
     serializer_class = serializers.RecipeDetailSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [
+        CachedTokenAuthentication,
+        SignedTokenAuthentication
+    ]
     permission_classes = [IsAuthenticated]
+    pagination_class = RecipeCursorPagination
 
     def get_queryset(self):
         """
         Retrieve recipes for authenticated user
         """
-        return self.queryset.filter(user=self.request.user).order_by('-id')
+        queryset = self.queryset.filter(
+            user=self.request.user
+        ).order_by('-id')
+
+        fields = self.get_requested_fields()
+        if fields is not None:
+            queryset = queryset.only(*fields)
+
+        return queryset
+
+    def get_requested_fields(self):
+        """
+        Return the fields requested with ?fields=, or None for all fields
+        """
+        if self.action not in SPARSE_FIELDS_ACTIONS:
+            return None
+        value = self.request.query_params.get('fields')
+        if not value:
+            return None
+
+        requested = {name.strip() for name in value.split(',')} - {''}
+        available = self.get_serializer_class().Meta.fields
+        unknown = requested.difference(available)
+        if unknown:
+            raise ValidationError({
+                'fields': [f'Unknown fields: {", ".join(sorted(unknown))}.']
+            })
+
+        return [name for name in available if name in requested]
+
+    def get_serializer(self, *args, **kwargs):
+        """
+        Return a serializer limited to the requested fields
+        """
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs['fields'] = fields
+
+        return super().get_serializer(*args, **kwargs)
 
     def get_serializer_class(self):
         """
         Return serializer class for request
         """
-        if self.action == 'list':
+        if self.action in ('list', 'stream'):
             # if we call list endpoint, we use RecipeSerializer
             return serializers.RecipeSerializer
+        if self.action == 'stats':
+            return serializers.RecipeStatsSerializer
 
         return self.serializer_class
 
@@ -39,3 +125,280 @@ class RecipeViewSet(viewsets.ModelViewSet):
         Create a new recipe
         """
         serializer.save(user=self.request.user)
+
+    def perform_update(self, serializer):
+        """
+        Update a recipe
+        """
+        serializer.save()
+
+    def perform_destroy(self, instance):
+        """
+        Delete a recipe
+        """
+        instance.delete()
+
+    def get_bulk_batch_size(self):
+        """
+        Return the insert batch size requested by the client, capped
+        """
+        options = get_settings('RECIPE_BULK', DEFAULT_BULK_SETTINGS)
+        try:
+            batch_size = int(self.request.query_params.get(
+                'batch_size', options['BATCH_SIZE']
+            ))
+        except ValueError:
+            raise ValidationError({'batch_size': ['Must be an integer.']})
+
+        return max(1, min(batch_size, options['MAX_BATCH_SIZE']))
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Create many recipes with batched inserts in one transaction
+
+        Invalid items are reported by index and the valid ones are still
+        created, unless ?all_or_nothing=true is given.
+        """
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError(
+                {'non_field_errors': ['Expected a list of recipes.']}
+            )
+        options = get_settings('RECIPE_BULK', DEFAULT_BULK_SETTINGS)
+        max_items = options['MAX_ITEMS']
+        if len(items) > max_items:
+            raise ValidationError({'non_field_errors': [
+                f'Ensure there are no more than {max_items} recipes.'
+            ]})
+        batch_size = self.get_bulk_batch_size()
+
+        recipes = []
+        errors = []
+        for index, item in enumerate(items):
+            serializer = self.get_serializer(data=item)
+            if serializer.is_valid():
+                recipes.append(
+                    Recipe(user=request.user, **serializer.validated_data)
+                )
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
+
+        if errors and (not recipes or query_flag(request, 'all_or_nothing')):
+            return Response(
+                {'created': 0, 'errors': errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            Recipe.objects.bulk_create(recipes, batch_size=batch_size)
+
+        return Response(
+            {'created': len(recipes), 'errors': errors},
+            status=(
+                status.HTTP_207_MULTI_STATUS if errors
+                else status.HTTP_201_CREATED
+            )
+        )
+
+    def get_bulk_ids_serializer(self, serializer_class):
+        """
+        Return a validated ids serializer for the request body
+        """
+        options = get_settings('RECIPE_BULK', DEFAULT_BULK_SETTINGS)
+        serializer = serializer_class(
+            data=self.request.data,
+            context={'max_items': options['MAX_ITEMS']}
+        )
+        serializer.is_valid(raise_exception=True)
+        return serializer
+
+    @bulk.mapping.patch
+    def bulk_update(self, request):
+        """
+        Update many recipes with set-based statements
+
+        Accepts either {"ids": [...], "changes": {...}}, applied with one
+        UPDATE ... WHERE id IN (...), or a list of partial recipes with
+        their "id", applied with bulk_update.
+        """
+        if isinstance(request.data, list):
+            return self.bulk_update_each(request.data)
+
+        ids_serializer = self.get_bulk_ids_serializer(
+            serializers.RecipeBulkUpdateSerializer
+        )
+        serializer = self.get_serializer(
+            data=ids_serializer.validated_data['changes'],
+            partial=True
+        )
+        serializer.is_valid(raise_exception=True)
+        if not serializer.validated_data:
+            raise ValidationError(
+                {'changes': ['No updatable fields were given.']}
+            )
+
+        updated = self.get_queryset().filter(
+            id__in=ids_serializer.validated_data['ids']
+        ).update(updated_at=timezone.now(), **serializer.validated_data)
+
+        return Response({'updated': updated})
+
+    def bulk_update_each(self, items):
+        """
+        Apply a different partial update to each listed recipe
+        """
+        options = get_settings('RECIPE_BULK', DEFAULT_BULK_SETTINGS)
+        max_items = options['MAX_ITEMS']
+        if len(items) > max_items:
+            raise ValidationError({'non_field_errors': [
+                f'Ensure there are no more than {max_items} recipes.'
+            ]})
+
+        changes = {}
+        listed = {}
+        errors = []
+        for index, item in enumerate(items):
+            recipe_id = item.get('id') if isinstance(item, dict) else None
+            # bool is an int subclass, True would update recipe 1
+            if isinstance(recipe_id, bool) or not isinstance(recipe_id, int):
+                errors.append({'index': index, 'errors': {
+                    'id': ['A recipe id is required.']
+                }})
+                continue
+            if recipe_id in listed:
+                # Only one change per recipe is applied, never merged
+                errors.append({'index': index, 'errors': {
+                    'id': [f'Already listed at index {listed[recipe_id]}.']
+                }})
+                continue
+            listed[recipe_id] = index
+            serializer = self.get_serializer(data=item, partial=True)
+            if serializer.is_valid():
+                changes[recipe_id] = (index, serializer.validated_data)
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
+
+        recipes = self.get_queryset().in_bulk(list(changes))
+        fields = {'updated_at'}
+        now = timezone.now()
+        for recipe_id, (index, data) in changes.items():
+            recipe = recipes.get(recipe_id)
+            if recipe is None:
+                errors.append({'index': index, 'errors': {
+                    'id': ['Not found.']
+                }})
+                continue
+            for name, value in data.items():
+                setattr(recipe, name, value)
+            recipe.updated_at = now
+            fields.update(data)
+
+        if recipes:
+            with transaction.atomic():
+                Recipe.objects.bulk_update(
+                    recipes.values(),
+                    sorted(fields),
+                    batch_size=self.get_bulk_batch_size()
+                )
+
+        return Response(
+            {'updated': len(recipes), 'errors': errors},
+            status=(
+                status.HTTP_207_MULTI_STATUS if errors
+                else status.HTTP_200_OK
+            )
+        )
+
+    @bulk.mapping.delete
+    def bulk_destroy(self, request):
+        """
+        Delete many recipes with a single DELETE ... WHERE id IN (...)
+        """
+        serializer = self.get_bulk_ids_serializer(
+            serializers.RecipeIdsSerializer
+        )
+        deleted, _ = self.get_queryset().filter(
+            id__in=serializer.validated_data['ids']
+        ).delete()
+
+        return Response({'deleted': deleted})
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """
+        Return the precomputed statistics of the user's recipes
+
+        Served from the response cache like list and retrieve, so a hit
+        costs no query and a miss reads a single stats row.
+        """
+        return self.cached_response(self.stats_response, request)
+
+    def stats_response(self, request):
+        """
+        Build the uncached statistics response for the user
+        """
+        stats = RecipeStats.objects.filter(user=request.user).first()
+        if stats is None:
+            # Rows are created by the user's first recipe write
+            stats = RecipeStats(user_id=request.user.pk)
+
+        return Response(self.get_serializer(stats).data)
+
+    @action(detail=False, methods=['get'])
+    def stream(self, request):
+        """
+        Stream every recipe of the user as a single JSON array
+
+        The request is validated before the response starts; errors
+        raised while streaming would follow a 200 and a partial body.
+        """
+        queryset = self.get_queryset()
+        plan = self.get_field_plan()
+        if plan is None:
+            # The serializers validate ?fields= only once streaming
+            self.get_requested_fields()
+
+        return StreamingHttpResponse(
+            self.stream_chunks(queryset, plan),
+            content_type='application/json'
+        )
+
+    def stream_chunks(self, queryset, plan):
+        """
+        Yield the JSON array of recipes one chunk of rows at a time
+
+        Chunks are fetched by keyset on id rather than with
+        QuerySet.iterator(), because MySQLdb buffers the whole result
+        set client side and memory would grow with the table.
+        """
+        chunk_size = getattr(
+            settings, 'RECIPE_STREAM_CHUNK_SIZE', DEFAULT_STREAM_CHUNK_SIZE
+        )
+        if plan is not None:
+            queryset = queryset.values_list(*plan.columns, named=True)
+        renderer = ORJSONRenderer()
+        last_id = None
+
+        yield b'['
+        while True:
+            chunk = queryset
+            if last_id is not None:
+                chunk = chunk.filter(id__lt=last_id)
+            recipes = list(chunk[:chunk_size])
+            if not recipes:
+                break
+
+            if plan is not None:
+                data = plan.render_rows(recipes)
+            else:
+                data = self.get_serializer(recipes, many=True).data
+            if last_id is not None:
+                yield b','
+            # Strip the brackets so chunks join into one array
+            yield renderer.render(data)[1:-1]
+
+            last_id = recipes[-1].id
+            if len(recipes) < chunk_size:
+                break
+        yield b']'
@@ -0,0 +1,80 @@
+"""
+Async views for the user API
+"""
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth import get_user_model
+
+from rest_framework import status
+
+from core.async_views import (
+    async_api_view,
+    json_response,
+    method_not_allowed,
+    parse_json,
+)
+from core.deletion import schedule_user_deletion
+from user.serializers import UserDeletionSerializer, UserSerializer
+
+
+def get_user(request):
+    """
+    Return the full authenticated user
+    """
+    if isinstance(request.auth, dict):
+        # signed tokens only carry the user id
+        return get_user_model().objects.get(pk=request.user.pk)
+
+    return request.user
+
+
+def retrieve_user(request):
+    """
+    Return the serialized authenticated user
+
+    Serializing may load recipe_count, which cached users leave out.
+    """
+    return UserSerializer(get_user(request)).data
+
+
+def update_user(request, data):
+    """
+    Validate and save changes to the authenticated user
+    """
+    serializer = UserSerializer(
+        get_user(request),
+        data=data,
+        partial=request.method == 'PATCH'
+    )
+    serializer.is_valid(raise_exception=True)
+    serializer.save()
+
+    return serializer.data
+
+
+def delete_user(request):
+    """
+    Schedule the deletion of the authenticated user
+    """
+    job = schedule_user_deletion(get_user(request))
+    return UserDeletionSerializer(job).data
+
+
+@async_api_view
+async def manage_user(request):
+    """
+    Retrieve, update or delete the authenticated user
+    """
+    if request.method == 'GET':
+        data = await sync_to_async(retrieve_user)(request)
+        return json_response(data)
+
+    if request.method in ('PUT', 'PATCH'):
+        data = await sync_to_async(update_user)(request, parse_json(request))
+        return json_response(data)
+
+    if request.method == 'DELETE':
+        data = await sync_to_async(delete_user)(request)
+        return json_response(data, status.HTTP_202_ACCEPTED)
+
+    return method_not_allowed(request)
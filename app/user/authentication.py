@@ -0,0 +1,257 @@
+"""
+Authentication classes for the API
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    BaseAuthentication,
+    TokenAuthentication,
+    get_authorization_header
+)
+from rest_framework.authtoken.models import Token
+
+from core.conf import get_settings
+from user.tokens import InvalidToken, verify_access_token
+
+
+DEFAULT_TOKEN_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': 300,  # seconds in the shared cache
+    'LOCAL_MAXSIZE': 1024,  # entries in each process' LRU
+    'LOCAL_TIMEOUT': 5,  # seconds in each process' LRU
+}
+
+# User fields left out of cached entries and loaded on access instead;
+# they change without the user being saved
+UNCACHED_USER_FIELDS = ('recipe_count',)
+
+
+class LocalTokenCache:
+    """
+    Thread-safe in-process LRU of token key to cached user data
+
+    Entries expire after a short timeout so that evictions made by other
+    processes through the shared cache are picked up quickly.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, data = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return data
+
+    def set(self, key, data, timeout, maxsize):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_user(self, user_id):
+        with self._lock:
+            stale = [
+                key for key, (_expires, data) in self._entries.items()
+                if data['user_id'] == user_id
+            ]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_token_cache = LocalTokenCache()
+
+
+def shared_cache_key(key):
+    """
+    Return the shared cache key for a token without exposing the token
+    """
+    return 'auth:token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def evict_token(key):
+    """
+    Remove a token from both cache tiers
+    """
+    local_token_cache.delete(key)
+    options = get_settings('TOKEN_AUTH_CACHE', DEFAULT_TOKEN_CACHE)
+    caches[options['ALIAS']].delete(shared_cache_key(key))
+
+
+def evict_user(user_id):
+    """
+    Remove every cached token belonging to a user
+    """
+    local_token_cache.delete_user(user_id)
+    keys = Token.objects.filter(user_id=user_id).values_list('key', flat=True)
+    options = get_settings('TOKEN_AUTH_CACHE', DEFAULT_TOKEN_CACHE)
+    caches[options['ALIAS']].delete_many(
+        [shared_cache_key(key) for key in keys]
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication backed by an in-process LRU and a shared cache
+
+    A drop-in replacement for TokenAuthentication which skips the token
+    and user lookup for tokens seen recently. Cached entries are evicted
+    by the signal handlers in user.signals when a token is deleted or its
+    user is saved.
+    """
+
+    def authenticate_credentials(self, key):
+        options = get_settings('TOKEN_AUTH_CACHE', DEFAULT_TOKEN_CACHE)
+        data = local_token_cache.get(key)
+
+        if data is None:
+            shared = caches[options['ALIAS']]
+            data = shared.get(shared_cache_key(key))
+            if data is None:
+                user, token = super().authenticate_credentials(key)
+                data = self.dump(user, token)
+                shared.set(shared_cache_key(key), data, options['TIMEOUT'])
+                local_token_cache.set(
+                    key, data,
+                    options['LOCAL_TIMEOUT'], options['LOCAL_MAXSIZE']
+                )
+                # The fresh user also has the fields left out of the cache
+                return (user, token)
+            local_token_cache.set(
+                key, data, options['LOCAL_TIMEOUT'], options['LOCAL_MAXSIZE']
+            )
+
+        return self.load(key, data)
+
+    def dump(self, user, token):
+        """
+        Return the cacheable field values of an authenticated user
+        """
+        fields = [
+            f.attname for f in user._meta.concrete_fields
+            if f.name not in UNCACHED_USER_FIELDS
+        ]
+        return {
+            'db': user._state.db,
+            'user_id': user.pk,
+            'fields': fields,
+            'values': [getattr(user, name) for name in fields],
+            'created': token.created,
+        }
+
+    def load(self, key, data):
+        """
+        Rebuild a fresh user and token from cached values
+
+        Every request gets its own instances so views may modify
+        request.user without affecting the cache.
+        """
+        user = get_user_model().from_db(
+            data['db'], data['fields'], data['values']
+        )
+        token = Token.from_db(
+            data['db'],
+            ['key', 'user_id', 'created'],
+            [key, user.pk, data['created']]
+        )
+        token.user = user
+        return (user, token)
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    Authenticate stateless signed access tokens without a database query
+
+    Clients send "Authorization: Bearer <access token>". The user is
+    represented by an unsaved instance carrying only its primary key,
+    which is enough to scope querysets and assign foreign keys; views
+    needing the full user must load it.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+
+        if len(auth) != 2:
+            msg = _('Invalid token header.')
+            raise exceptions.AuthenticationFailed(msg)
+
+        try:
+            token = auth[1].decode()
+        except UnicodeError:
+            msg = _('Invalid token header.')
+            raise exceptions.AuthenticationFailed(msg)
+
+        return self.authenticate_credentials(token)
+
+    def authenticate_credentials(self, token):
+        try:
+            payload = verify_access_token(token)
+        except InvalidToken:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        user = get_user_model()(pk=payload['uid'])
+        user._state.adding = False
+        return (user, payload)
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+
+async def authenticate_async(request):
+    """
+    Authenticate a plain Django request from async code
+
+    Returns (user, auth) or None when no credentials were sent, and
+    raises AuthenticationFailed like the DRF classes. Signed tokens and
+    tokens in this process' LRU are checked inline; only a cache miss
+    hands the lookup to a worker thread.
+    """
+    auth = get_authorization_header(request).split()
+    if not auth:
+        return None
+
+    keyword = auth[0].lower()
+    if keyword == SignedTokenAuthentication.keyword.lower().encode():
+        return SignedTokenAuthentication().authenticate(request)
+
+    authenticator = CachedTokenAuthentication()
+    if keyword == authenticator.keyword.lower().encode() and len(auth) == 2:
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            key = None
+        data = local_token_cache.get(key) if key else None
+        if data is not None:
+            return authenticator.load(key, data)
+
+    return await sync_to_async(authenticator.authenticate)(request)
@@ -0,0 +1,78 @@
+"""
+Email validation for user signup and profile updates
+"""
+from django.core.cache import caches
+
+from email_validator import EmailUndeliverableError, validate_email
+from email_validator.deliverability import validate_email_deliverability
+
+from core.conf import get_settings
+
+
+SYNTAX = 'syntax'
+DELIVERABILITY = 'deliverability'
+
+DEFAULT_EMAIL_VALIDATION = {
+    'MODE': DELIVERABILITY,
+    'CACHE_ALIAS': 'default',
+    'CACHE_TTL': 60 * 60 * 24,  # seconds a deliverable domain is cached
+    'NEGATIVE_CACHE_TTL': 60 * 5,  # seconds an undeliverable one is cached
+    'DNS_TIMEOUT': 5,
+    # Domain results known in advance, e.g. {'example.com': True}
+    'DOMAINS': {},
+}
+
+
+def domain_cache_key(domain):
+    return f'email:domain:{domain}'
+
+
+def check_deliverability(domain, domain_i18n, options):
+    """
+    Raise EmailUndeliverableError if the domain cannot receive email
+
+    Results are cached per domain, failures for a shorter time. Lookups
+    that could not reach a nameserver are not cached at all.
+    """
+    seeded = options['DOMAINS'].get(domain)
+    if seeded is True:
+        return
+    if seeded is False:
+        raise EmailUndeliverableError(
+            f'The domain name {domain_i18n} does not accept email.'
+        )
+
+    cache = caches[options['CACHE_ALIAS']]
+    key = domain_cache_key(domain)
+    error = cache.get(key)
+
+    if error is None:
+        try:
+            info = validate_email_deliverability(
+                domain, domain_i18n, timeout=options['DNS_TIMEOUT']
+            )
+        except EmailUndeliverableError as exc:
+            error = str(exc)
+            cache.set(key, error, options['NEGATIVE_CACHE_TTL'])
+        else:
+            error = ''
+            if 'unknown-deliverability' not in info:
+                cache.set(key, error, options['CACHE_TTL'])
+
+    if error:
+        raise EmailUndeliverableError(error)
+
+
+def check_email(value):
+    """
+    Validate an email address according to the configured mode
+
+    Raises email_validator.EmailNotValidError for invalid addresses.
+    """
+    options = get_settings('EMAIL_VALIDATION', DEFAULT_EMAIL_VALIDATION)
+    result = validate_email(value, check_deliverability=False)
+
+    if options['MODE'] == DELIVERABILITY:
+        check_deliverability(result.ascii_domain, result.domain, options)
+
+    return value
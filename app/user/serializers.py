@@ -9,7 +9,9 @@ from django.utils.translation import gettext as _
 
 from rest_framework import serializers
 
-from email_validator import validate_email
+from core.models import UserDeletion
+from user.email_validation import check_email
+from user.tokens import InvalidToken, refresh_token_pair
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -19,7 +21,8 @@ class UserSerializer(serializers.ModelSerializer):
 
     class Meta:  # tells rest_framework what to parse to serializer
         model = get_user_model()
-        fields = ['email', 'password', 'name']
+        fields = ['email', 'password', 'name', 'recipe_count']
+        read_only_fields = ['recipe_count']
         extra_kwargs = {
             'password': {
                 'write_only': True,  # can only write vals to parser not read
@@ -29,8 +32,7 @@ class UserSerializer(serializers.ModelSerializer):
 
     def validate_email(self, value):
         try:
-            validate_email(value)
-            return value
+            return check_email(value)
         except Exception as e:
             raise serializers.ValidationError(str(e))
 
@@ -81,3 +83,36 @@ class AuthTokenSerializer(serializers.Serializer):
 
         attrs['user'] = user
         return attrs
+
+
+class RefreshTokenSerializer(serializers.Serializer):
+    """
+    Serializer for exchanging a refresh token for a new token pair
+    """
+    refresh = serializers.CharField(trim_whitespace=False)
+
+    def validate(self, attrs):
+        """
+        Validate the refresh token and issue new tokens
+        """
+        try:
+            attrs['tokens'] = refresh_token_pair(attrs['refresh'])
+        except InvalidToken:
+            msg = _('Invalid or expired refresh token.')
+            raise serializers.ValidationError(msg, code='authorization')
+
+        return attrs
+
+
+class UserDeletionSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the progress of a user deletion
+    """
+
+    class Meta:
+        model = UserDeletion
+        fields = [
+            'status', 'recipes_total', 'recipes_deleted', 'progress',
+            'requested_at', 'finished_at'
+        ]
+        read_only_fields = fields
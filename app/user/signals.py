@@ -0,0 +1,41 @@
+"""
+Signal handlers keeping the token authentication cache consistent
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from user.authentication import evict_token, evict_user
+
+
+def evict_now_and_on_commit(evict, using):
+    """
+    Run an eviction now and again once the writer's transaction commits
+
+    A request authenticating between the two would otherwise cache the
+    row the transaction has not committed yet.
+    """
+    evict()
+    if transaction.get_connection(using).in_atomic_block:
+        transaction.on_commit(evict, using=using)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, using, **kwargs):
+    """
+    Stop accepting a deleted token from the cache
+    """
+    key = instance.key
+    evict_now_and_on_commit(lambda: evict_token(key), using)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_saved(sender, instance, using, **kwargs):
+    """
+    Drop cached tokens of a user that changed, e.g. was deactivated
+    """
+    user_id = instance.pk
+    evict_now_and_on_commit(lambda: evict_user(user_id), using)
@@ -0,0 +1,273 @@
+"""
+Tests for the API authentication classes
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import (
+    CachedTokenAuthentication,
+    SignedTokenAuthentication,
+    local_token_cache,
+    shared_cache_key
+)
+
+
+ME_URL = reverse('user:me')
+SIGNED_TOKEN_URL = reverse('user:token-signed')
+REFRESH_TOKEN_URL = reverse('user:token-refresh')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """
+    Test token lookups are cached and evicted
+    """
+
+    def setUp(self):
+        cache.clear()
+        local_token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='name@domain.com',
+            password='testpass123',
+            name='Test Name'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_token_lookup_cached(self):
+        """
+        Test only the first request looks the token up in the database
+        """
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        # Only the uncached recipe_count is read
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_shared_cache_used_after_local_miss(self):
+        """
+        Test another process' entry in the shared cache is reused
+        """
+        self.client.get(ME_URL)
+        local_token_cache.clear()
+
+        # Only the uncached recipe_count is read
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_deleted_token_evicted(self):
+        """
+        Test a deleted token stops authenticating
+        """
+        self.client.get(ME_URL)
+        self.token.delete()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_evicted(self):
+        """
+        Test a deactivated user stops authenticating
+        """
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_saved_user_evicted(self):
+        """
+        Test changes to a user are visible on the next request
+        """
+        self.client.get(ME_URL)
+        self.user.name = 'Changed Name'
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'Changed Name')
+
+    def test_user_evicted_again_on_commit(self):
+        """
+        Test an entry cached before the deactivation committed is evicted
+        """
+        stale = CachedTokenAuthentication().dump(self.user, self.token)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.user.is_active = False
+                self.user.save()
+                # Another process still reading the committed row
+                cache.set(shared_cache_key(self.token.key), stale)
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class SignedTokenAuthenticationTests(TestCase):
+    """
+    Test stateless signed access and refresh tokens
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='name@domain.com',
+            password='testpass123',
+            name='Test Name'
+        )
+        self.client = APIClient()
+
+    def obtain_tokens(self):
+        res = self.client.post(SIGNED_TOKEN_URL, {
+            'email': 'name@domain.com',
+            'password': 'testpass123'
+        })
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_access_token_verified_without_query(self):
+        """
+        Test an access token is verified without touching the database
+        """
+        tokens = self.obtain_tokens()
+
+        with self.assertNumQueries(0):
+            user, payload = SignedTokenAuthentication(
+            ).authenticate_credentials(tokens['access'])
+
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_access_token_authenticates_me(self):
+        """
+        Test the me endpoint works with a bearer access token
+        """
+        tokens = self.obtain_tokens()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}'
+        )
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_access_token_creates_recipe(self):
+        """
+        Test a recipe created with a bearer token belongs to the user
+        """
+        tokens = self.obtain_tokens()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}'
+        )
+
+        res = self.client.post(reverse('recipes:recipe-list'), {
+            'title': 'Sample recipe title',
+            'time_minutes': 22,
+            'price': '5.25',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipes = self.user.recipe_set.filter(id=res.data['id'])
+        self.assertTrue(recipes.exists())
+
+    def test_tampered_access_token_rejected(self):
+        """
+        Test an access token with a modified payload is rejected
+        """
+        tokens = self.obtain_tokens()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer x{tokens["access"]}'
+        )
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_expired_access_token_rejected(self):
+        """
+        Test an access token past its expiry is rejected
+        """
+        with override_settings(SIGNED_TOKEN_ACCESS_LIFETIME=-1):
+            tokens = self.obtain_tokens()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}'
+        )
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_issues_new_pair(self):
+        """
+        Test a refresh token can be exchanged for new tokens
+        """
+        tokens = self.obtain_tokens()
+
+        res = self.client.post(
+            REFRESH_TOKEN_URL,
+            {'refresh': tokens['refresh']}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('access', res.data)
+        self.assertIn('refresh', res.data)
+
+    def test_refresh_rejected_after_password_change(self):
+        """
+        Test changing the password invalidates refresh tokens
+        """
+        tokens = self.obtain_tokens()
+        self.user.set_password('newpass123')
+        self.user.save()
+
+        res = self.client.post(
+            REFRESH_TOKEN_URL,
+            {'refresh': tokens['refresh']}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_refresh_rejected_for_inactive_user(self):
+        """
+        Test a deactivated user cannot refresh tokens
+        """
+        tokens = self.obtain_tokens()
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.post(
+            REFRESH_TOKEN_URL,
+            {'refresh': tokens['refresh']}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_access_token_not_accepted_as_refresh(self):
+        """
+        Test an access token cannot be used to refresh
+        """
+        tokens = self.obtain_tokens()
+
+        res = self.client.post(
+            REFRESH_TOKEN_URL,
+            {'refresh': tokens['access']}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,88 @@
+"""
+Tests for signup email validation
+"""
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from email_validator import EmailNotValidError, EmailUndeliverableError
+
+from user.email_validation import check_email
+
+
+DELIVERABILITY = 'user.email_validation.validate_email_deliverability'
+
+
+class EmailValidationTests(TestCase):
+    """
+    Test email validation modes and the domain result cache
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(EMAIL_VALIDATION={'MODE': 'syntax'})
+    def test_syntax_mode_skips_dns(self):
+        """
+        Test syntax mode never looks the domain up
+        """
+        with patch(DELIVERABILITY) as lookup:
+            self.assertEqual(check_email('a@domain.com'), 'a@domain.com')
+
+        lookup.assert_not_called()
+
+    @override_settings(EMAIL_VALIDATION={'MODE': 'syntax'})
+    def test_syntax_mode_rejects_invalid_address(self):
+        """
+        Test syntax mode still rejects malformed addresses
+        """
+        with self.assertRaises(EmailNotValidError):
+            check_email('not-an-email')
+
+    @override_settings(EMAIL_VALIDATION={
+        'DOMAINS': {'good.com': True, 'bad.com': False}
+    })
+    def test_seeded_domains_skip_dns(self):
+        """
+        Test pre-seeded domain results are used without a lookup
+        """
+        with patch(DELIVERABILITY) as lookup:
+            check_email('a@good.com')
+            with self.assertRaises(EmailUndeliverableError):
+                check_email('a@bad.com')
+
+        lookup.assert_not_called()
+
+    def test_deliverable_domain_cached(self):
+        """
+        Test a domain is looked up once for many addresses
+        """
+        with patch(DELIVERABILITY, return_value={'mx': []}) as lookup:
+            check_email('a@domain.com')
+            check_email('b@domain.com')
+
+        lookup.assert_called_once()
+
+    def test_undeliverable_domain_cached(self):
+        """
+        Test an undeliverable domain is rejected from the cache
+        """
+        error = EmailUndeliverableError('The domain name does not exist.')
+        with patch(DELIVERABILITY, side_effect=error) as lookup:
+            for address in ('a@nowhere.com', 'b@nowhere.com'):
+                with self.assertRaises(EmailUndeliverableError):
+                    check_email(address)
+
+        lookup.assert_called_once()
+
+    def test_unknown_deliverability_not_cached(self):
+        """
+        Test a lookup that timed out is accepted but retried next time
+        """
+        result = {'unknown-deliverability': 'timeout'}
+        with patch(DELIVERABILITY, return_value=result) as lookup:
+            check_email('a@domain.com')
+            check_email('b@domain.com')
+
+        self.assertEqual(lookup.call_count, 2)
@@ -1,13 +1,16 @@
 """
 Tests for the user API
 """
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from core.models import UserDeletion
+
 
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
@@ -21,6 +24,7 @@ def create_user(**params):
     return get_user_model().objects.create_user(**params)
 
 
+@override_settings(EMAIL_VALIDATION={'DOMAINS': {'domain.com': True}})
 class PublicUserAPITests(TestCase):
     """
     Tests the public endpoints in the API
@@ -311,7 +315,8 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, {
             'name': self.user.name,
-            'email': self.user.email
+            'email': self.user.email,
+            'recipe_count': 0
         })
 
     def test_post_me_error(self):
@@ -337,3 +342,24 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(self.user.name, payload['name'])
         self.assertTrue(self.user.check_password(payload['password']))
+
+    def test_delete_schedules_deletion(self):
+        """
+        Test deleting the user deactivates it and queues the deletion
+        """
+        token = Token.objects.create(user=self.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        client.get(ME_URL)
+
+        res = client.delete(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data['status'], UserDeletion.PENDING)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertTrue(UserDeletion.objects.filter(user=self.user).exists())
+
+        res = client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,103 @@
+"""
+Stateless HMAC-signed access and refresh tokens
+
+Access tokens carry the user id and an expiry and are verified with
+SECRET_KEY alone, so checking one never touches the database. They
+cannot be revoked, which is why they are short-lived; refresh tokens are
+checked against the database and stop working once the user is
+deactivated or changes their password.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+
+ACCESS_SALT = 'user.tokens.access'
+REFRESH_SALT = 'user.tokens.refresh'
+PASSWORD_SALT = 'user.tokens.password'
+
+
+class InvalidToken(Exception):
+    """
+    Raised when a signed token is malformed, tampered with or expired
+    """
+
+
+def access_lifetime():
+    return getattr(settings, 'SIGNED_TOKEN_ACCESS_LIFETIME', 300)
+
+
+def refresh_lifetime():
+    return getattr(settings, 'SIGNED_TOKEN_REFRESH_LIFETIME', 1209600)
+
+
+def password_stamp(user):
+    """
+    Return a digest which changes whenever the user's password changes
+    """
+    return salted_hmac(PASSWORD_SALT, user.password).hexdigest()[:16]
+
+
+def issue_token_pair(user):
+    """
+    Return a new access and refresh token for the user
+    """
+    now = int(time.time())
+    access = signing.dumps(
+        {'uid': user.pk, 'exp': now + access_lifetime()},
+        salt=ACCESS_SALT
+    )
+    refresh = signing.dumps(
+        {
+            'uid': user.pk,
+            'exp': now + refresh_lifetime(),
+            'pwd': password_stamp(user),
+        },
+        salt=REFRESH_SALT
+    )
+
+    return {
+        'access': access,
+        'refresh': refresh,
+        'expires_in': access_lifetime(),
+    }
+
+
+def _load(token, salt):
+    try:
+        payload = signing.loads(token, salt=salt)
+    except signing.BadSignature:
+        raise InvalidToken('Token signature is invalid.')
+
+    if payload.get('exp', 0) < time.time():
+        raise InvalidToken('Token has expired.')
+
+    return payload
+
+
+def verify_access_token(token):
+    """
+    Return the payload of a valid access token
+    """
+    return _load(token, ACCESS_SALT)
+
+
+def refresh_token_pair(token):
+    """
+    Return a new token pair in exchange for a valid refresh token
+    """
+    payload = _load(token, REFRESH_SALT)
+    user = get_user_model().objects.filter(
+        pk=payload['uid'],
+        is_active=True
+    ).first()
+
+    if user is None or not constant_time_compare(
+        payload.get('pwd', ''), password_stamp(user)
+    ):
+        raise InvalidToken('Token is no longer valid.')
+
+    return issue_token_pair(user)
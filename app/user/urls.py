@@ -3,7 +3,7 @@ URL mapping for the user API
 """
 from django.urls import path
 
-from user import views
+from user import async_views, views
 
 
 app_name = 'user'
@@ -11,5 +11,16 @@ app_name = 'user'
 urlpatterns = [
     path('create/', views.CreateUserView.as_view(), name='create'),
     path('token/', views.CreateTokenView.as_view(), name='token'),
+    path(
+        'token/signed/',
+        views.CreateSignedTokenView.as_view(),
+        name='token-signed'
+    ),
+    path(
+        'token/refresh/',
+        views.RefreshTokenView.as_view(),
+        name='token-refresh'
+    ),
     path('me/', views.ManageUserView.as_view(), name='me'),
+    path('async/me/', async_views.manage_user, name='async-me'),
 ]
@@ -1,14 +1,27 @@
 """
 Views for the user API
 """
-from rest_framework import generics, authentication, permissions
+from django.contrib.auth import get_user_model
+
+from rest_framework import generics, permissions, status
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 
+from core.deletion import schedule_user_deletion
+from core.routers import ReplicaReadMixin
+from user.authentication import (
+    CachedTokenAuthentication,
+    SignedTokenAuthentication
+)
 from user.serializers import (
     UserSerializer,
-    AuthTokenSerializer
+    AuthTokenSerializer,
+    RefreshTokenSerializer,
+    UserDeletionSerializer
 )
+from user.tokens import issue_token_pair
 
 
 class CreateUserView(generics.CreateAPIView):
@@ -26,16 +39,70 @@ class CreateTokenView(ObtainAuthToken):
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class CreateSignedTokenView(APIView):
+    """
+    Create a signed access and refresh token pair for a user
+    """
+    serializer_class = AuthTokenSerializer
+    authentication_classes = []
+    permission_classes = []
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(
+            data=request.data,
+            context={'request': request}
+        )
+        serializer.is_valid(raise_exception=True)
+        return Response(issue_token_pair(serializer.validated_data['user']))
+
+
+class RefreshTokenView(APIView):
+    """
+    Exchange a refresh token for a new signed token pair
+    """
+    serializer_class = RefreshTokenSerializer
+    authentication_classes = []
+    permission_classes = []
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.validated_data['tokens'])
+
+
+class ManageUserView(ReplicaReadMixin,
+                     generics.RetrieveUpdateDestroyAPIView):
     """
     Manage the authenticated user
     """
+    replica_actions = ('get',)
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [
+        CachedTokenAuthentication,
+        SignedTokenAuthentication
+    ]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
         """
         Retrieve and return the authenticated user
         """
+        authenticator = self.request.successful_authenticator
+        if isinstance(authenticator, SignedTokenAuthentication):
+            # signed tokens only carry the user id
+            return get_user_model().objects.get(pk=self.request.user.pk)
+
         return self.request.user
+
+    def destroy(self, request, *args, **kwargs):
+        """
+        Deactivate the user and schedule the deletion of their data
+
+        Recipes are deleted in the background by process_user_deletions,
+        so the response only reports the queued job.
+        """
+        job = schedule_user_deletion(self.get_object())
+        return Response(
+            UserDeletionSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED
+        )